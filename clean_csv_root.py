@@ -5,6 +5,15 @@ import os
 # Paths relative to script location
 INPUT_FILE = os.path.join("Data", "products.csv")
 OUTPUT_FILE = os.path.join("Data", "products_clean.csv")
+SNAPSHOT_FILE = os.path.join("Data", "products_clean.parquet")
+
+# Shared catalog snapshot format lives in the backend package
+# (run with PYTHONPATH=v2_project/backend and pyarrow installed)
+try:
+    from app.core.catalog_snapshot import SnapshotWriter
+except ImportError as e:
+    print(f"⚠️  Skipping Parquet snapshot ({e}); set PYTHONPATH=v2_project/backend and install pyarrow")
+    SnapshotWriter = None
 
 def clean_csv():
     print(f"Reading from: {INPUT_FILE}")
@@ -19,6 +28,8 @@ def clean_csv():
         
         print(f"Detected {num_columns} valid columns: {valid_headers}")
         
+        snapshot = SnapshotWriter(SNAPSHOT_FILE) if SnapshotWriter else None
+        
         with open(OUTPUT_FILE, 'w', encoding='utf-8', newline='') as f_out:
             writer = csv.writer(f_out)
             writer.writerow(valid_headers)
@@ -40,11 +51,17 @@ def clean_csv():
                      continue
 
                 writer.writerow(cleaned_row)
+                if snapshot:
+                    snapshot.write(dict(zip(valid_headers, cleaned_row)))
                 count += 1
                 
             print(f"Cleaned {count} rows.")
             print(f"Removed {empty_rows} empty rows.")
             print(f"Output saved to: {OUTPUT_FILE}")
+        
+        if snapshot:
+            snapshot.close()
+            print(f"Snapshot saved to: {SNAPSHOT_FILE}")
 
 if __name__ == "__main__":
     clean_csv()
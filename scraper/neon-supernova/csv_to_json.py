@@ -59,10 +59,23 @@ def convert_csv_to_json(csv_path, json_path=None, indent=2):
             if pd.isna(value):
                 record[key] = None
 
-    # Write to JSON
+    # Write a typed Parquet snapshot instead of JSON
+    if json_path.endswith('.parquet'):
+        # Shared format from the backend package (PYTHONPATH=v2_project/backend)
+        from app.core.catalog_snapshot import write_snapshot
+        print(f"Writing snapshot: {json_path}")
+        count = write_snapshot(records, json_path)
+        print(f"  ✓ Saved {count} records to: {json_path}")
+        return json_path
+    
+    # Write to JSON (one record per line for .jsonl, so ingest can stream it)
     print(f"Writing JSON: {json_path}")
     with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(records, f, indent=indent, ensure_ascii=False)
+        if json_path.endswith('.jsonl'):
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            json.dump(records, f, indent=indent, ensure_ascii=False)
     
     # Get file size
     file_size = os.path.getsize(json_path)
@@ -80,6 +93,8 @@ def main():
         print("\nExample:")
         print("  python csv_to_json.py scraped_data/products.csv")
         print("  python csv_to_json.py scraped_data/products.csv output.json")
+        print("  python csv_to_json.py scraped_data/products.csv products.jsonl")
+        print("  python csv_to_json.py scraped_data/products.csv products.parquet")
         sys.exit(1)
     
     csv_path = sys.argv[1]
@@ -12,6 +12,14 @@ import sys
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Shared catalog snapshot format lives in the backend package
+# (run with PYTHONPATH=../../v2_project/backend and pyarrow installed)
+try:
+    from app.core.catalog_snapshot import write_snapshot
+except ImportError as e:
+    logger.warning(f"Parquet catalog snapshot disabled ({e}); set PYTHONPATH to v2_project/backend and install pyarrow")
+    write_snapshot = None
+
 class SickScraper:
     def __init__(self, input_csv, output_folder='scraped_data', proxies=None):
         self.input_csv = input_csv
@@ -20,6 +28,7 @@ class SickScraper:
         self.pdfs_folder = os.path.join(output_folder, 'pdfs')
         self.results_file = os.path.join(output_folder, 'products.csv')
         self.json_results_file = os.path.join(output_folder, 'products.json')
+        self.snapshot_file = os.path.join(output_folder, 'products.parquet')
         self.data = []
         
         # Proxy configuration (list of proxy URLs)
@@ -641,11 +650,21 @@ class SickScraper:
             except:
                 pass
 
+        # Typed snapshot for the ingesters (written once, not per product)
+        if self.data and write_snapshot:
+            try:
+                count = write_snapshot(self.data, self.snapshot_file)
+                logger.info(f"✓ Wrote catalog snapshot with {count} products")
+            except Exception as e:
+                logger.error(f"Failed to write catalog snapshot: {e}")
+
         # Final summary
         if self.data:
             logger.info(f"✓ Scraping complete! Successfully scraped {len(self.data)} products.")
             logger.info(f"  CSV: {self.results_file}")
             logger.info(f"  JSON: {self.json_results_file}")
+            if write_snapshot:
+                logger.info(f"  Parquet: {self.snapshot_file}")
         else:
             logger.warning("No data scraped.")
 
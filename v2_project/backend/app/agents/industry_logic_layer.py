@@ -1,6 +1,10 @@
+import asyncio
 import json
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional
 from .base import BaseAgent
+from ..core.config import settings
+from ..core.product_graph import ProductGraphStore
 
 # AGENT 6: ComplianceGuide
 class ComplianceGuideAgent(BaseAgent):
@@ -78,3 +82,53 @@ class TroubleshootAgent(BaseAgent):
         }
         """
         super().__init__(name="Troubleshooter", system_prompt=system_prompt)
+        self.graph = ProductGraphStore()
+    
+    # Requests that are answered from the catalog graph alone
+    SUBSTITUTION_RE = re.compile(
+        r"successor|replace|substitut|alternative|obsolete|phased|discontinu|accessor", re.IGNORECASE
+    )
+    
+    def lookup_catalog(self, part_number: str) -> Optional[Dict]:
+        """Successor and accessory facts for a part from the product graph"""
+        graph = self.graph.get()
+        chain = graph.successor_chain(part_number)
+        accessories = graph.accessories_for(part_number)
+        if not chain and not accessories and part_number not in graph.phased_out:
+            return None
+        return {
+            "part_number": part_number,
+            "phased_out": part_number in graph.phased_out,
+            "successor_chain": chain,
+            "replacement": chain[-1] if chain else None,
+            "replacement_name": graph.names.get(chain[-1], "") if chain else None,
+            "accessories": [{"sku": pn, "name": graph.names.get(pn, "")} for pn in accessories],
+        }
+    
+    def catalog_facts(self, text: str) -> List[Dict]:
+        """Catalog facts for every graph part mentioned in `text`"""
+        return [f for f in (self.lookup_catalog(pn) for pn in self.graph.find_part_numbers(text)) if f]
+    
+    async def run(self, user_input: str, context: Dict = {}) -> str:
+        """Answer substitution questions from the graph; use the LLM for diagnosis"""
+        # The graph (re)loads from disk on first use and after ingest; keep that off the loop
+        facts = await asyncio.to_thread(self.catalog_facts, user_input)
+        
+        if facts and self.SUBSTITUTION_RE.search(user_input):
+            fact = facts[0]
+            return json.dumps({
+                "diagnosis": "Part is phased out" if fact["phased_out"] else "Part is current",
+                "fix_action": (f"Replace {fact['part_number']} with {fact['replacement']}"
+                               if fact["replacement"] else "No successor listed in the catalog"),
+                "successor_part": ({"sku": fact["replacement"], "brand": settings.PRODUCTS_BRAND}
+                                   if fact["replacement"] else None),
+                "successor_chain": fact["successor_chain"],
+                "accessories": fact["accessories"],
+                "escalate_to_integrator": fact["phased_out"] and not fact["replacement"],
+                "source": "catalog"
+            })
+        
+        if facts:
+            # Ground the LLM in catalog facts instead of letting it guess successors
+            user_input = f"{user_input}\n\nCatalog facts: {json.dumps(facts)}"
+        return await super().run(user_input, context)
@@ -1,10 +1,13 @@
+import asyncio
 import json
 from typing import Dict, Any, List
+import httpx
 from .base import BaseAgent
 from ..core.es_client import es_client
-from qdrant_client import QdrantClient
-from ..core.config import get_qdrant_url, settings
-import requests
+from ..core.config import settings
+from ..core.embeddings import prepare_embedding
+from ..core.datasheet_retrieval import DatasheetRetriever
+from ..core.product_graph import ProductGraphStore
 
 # AGENT 4: InventoryVoice
 class InventoryVoiceAgent(BaseAgent):
@@ -54,21 +57,23 @@ class TechDocAgent(BaseAgent):
         If the context doesn't contain the answer, say "I couldn't find that specific information in the manuals."
         """
         super().__init__(name="TechDoc", system_prompt=system_prompt)
-        self.qdrant = QdrantClient(url=get_qdrant_url())
         self.ollama_url = settings.OLLAMA_HOST
+        self.retriever = DatasheetRetriever()
+        # One pooled client so embedding calls never block the event loop
+        self.http = httpx.AsyncClient(timeout=10)
+        self.graph = ProductGraphStore()
 
     async def _get_embedding(self, text: str) -> List[float]:
         try:
-            response = requests.post(
+            response = await self.http.post(
                 f"{self.ollama_url}/api/embeddings",
                 json={
                     "model": settings.OLLAMA_EMBEDDING_MODEL,
                     "prompt": text
-                },
-                timeout=10
+                }
             )
             if response.status_code == 200:
-                return response.json()['embedding']
+                return prepare_embedding(response.json()['embedding'])
         except Exception as e:
             print(f"Embedding error: {e}")
         return []
@@ -76,30 +81,28 @@ class TechDocAgent(BaseAgent):
     async def query_manuals(self, query: str, limit: int = 3) -> str:
         """
         RAG Workflow:
-        1. Embed query.
-        2. Search Qdrant PDF collection.
+        1. Embed query and detect part numbers it mentions.
+        2. Hybrid search (BM25 on the datasheet index + vectors), filtered
+           to those parts, fused and reranked.
         3. Pass chunks + query to LLM.
         """
-        # 1. Embed
-        query_vector = await self._get_embedding(query)
-        if not query_vector:
-            return "Error: Could not process query."
+        # 1. Embed (BM25 still runs if embedding fails); the graph may need
+        # reloading from disk, so part lookup runs in a worker thread
+        query_vector, part_numbers = await asyncio.gather(
+            self._get_embedding(query),
+            asyncio.to_thread(self.graph.find_part_numbers, query)
+        )
 
         # 2. Search
-        try:
-            results = self.qdrant.search(
-                collection_name=settings.QDRANT_PDF_COLLECTION,
-                query_vector=query_vector,
-                limit=limit
-            )
-        except Exception:
-            return "Knowledge base unavailable."
+        chunks = await self.retriever.search(query, query_vector, limit=limit, part_numbers=part_numbers)
 
         # 3. Construct Context
         context_text = ""
-        for hit in results:
-            payload = hit.payload
-            info = f"Source: {payload.get('product_name')} ({payload.get('part_number')})\nContent: {payload.get('chunk_text')}\n---\n"
+        for chunk in chunks:
+            info = (
+                f"Source: {chunk.get('product_name')} ({chunk.get('part_number')}), {chunk.get('page_hint', '')}\n"
+                f"Content: {chunk.get('chunk_text')}\n---\n"
+            )
             context_text += info
 
         if not context_text:
@@ -116,3 +119,7 @@ class TechDocAgent(BaseAgent):
         """
         
         return await self.run(prompt)
+
+    async def close(self):
+        await self.http.aclose()
+        await self.retriever.close()
@@ -66,11 +66,13 @@ class VisualMatchAgent(BaseAgent):
             # Enhancer: Cross-reference with ES if brand/part detected
             matches = []
             if vision_data.get("part_number"):
-                # Await the now-async search methods
-                matches = await self.search_service.text_search(vision_data["part_number"], size=3)
-                
-                if not matches and vision_data.get("description"):
-                    matches = await self.search_service.semantic_search(vision_data["description"], limit=3)
+                # Run the part number and description lookups together; the
+                # description only answers when the part number finds nothing
+                lookups = [self.search_service.text_search(vision_data["part_number"], size=3)]
+                if vision_data.get("description"):
+                    lookups.append(self.search_service.semantic_search(vision_data["description"], limit=3))
+                results = await asyncio.gather(*lookups)
+                matches = next((r for r in results if r), [])
 
             return {
                 "identification": vision_data,
@@ -0,0 +1,181 @@
+"""
+Bulk Indexing
+Threaded, byte-sized Elasticsearch bulk loading with 429 backoff and a throughput report
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from elasticsearch import Elasticsearch, ApiError, helpers
+
+from app.core.config import settings
+
+# One serialized bulk operation: the action line and its source line (None for deletes)
+BulkOp = Tuple[bytes, Optional[bytes]]
+
+
+def _dumps(data: Dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def serialize_action(action: Dict) -> BulkOp:
+    """Serialize a helpers-style action dict into bulk NDJSON lines"""
+    meta, source = helpers.expand_action(action)
+    return _dumps(meta), (_dumps(source) if source is not None else None)
+
+
+def op_size(op: BulkOp) -> int:
+    """Bytes an operation adds to a bulk request body (including newlines)"""
+    action, source = op
+    return len(action) + 1 + (len(source) + 1 if source is not None else 0)
+
+
+def chunk_ops(ops: Iterable[BulkOp], chunk_size: Optional[int] = None,
+              max_chunk_bytes: Optional[int] = None) -> Iterator[List[BulkOp]]:
+    """Group serialized operations into chunks bounded by count and bytes"""
+    chunk_size = chunk_size or settings.ES_BULK_CHUNK_SIZE
+    max_chunk_bytes = max_chunk_bytes or settings.ES_BULK_MAX_CHUNK_BYTES
+
+    chunk: List[BulkOp] = []
+    size = 0
+    for op in ops:
+        op_bytes = op_size(op)
+        if chunk and (len(chunk) >= chunk_size or size + op_bytes > max_chunk_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(op)
+        size += op_bytes
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class BulkReport:
+    """Outcome and throughput of a bulk run"""
+    docs: int = 0
+    errors: int = 0
+    bytes: int = 0
+    retries: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    error_samples: List[str] = field(default_factory=list)
+
+    def merge(self, other: "BulkReport"):
+        self.docs += other.docs
+        self.errors += other.errors
+        self.bytes += other.bytes
+        self.retries += other.retries
+        self.chunks += other.chunks
+        self.error_samples.extend(other.error_samples[:10 - len(self.error_samples)])
+
+    def print_report(self, label: str = "Bulk indexing"):
+        elapsed = max(self.elapsed, 1e-6)
+        print(f"\n⏱️  {label} report:")
+        print(f"  - Operations: {self.docs} ok, {self.errors} failed in {self.chunks} requests")
+        print(f"  - Throughput: {self.docs / elapsed:.1f} docs/s, {self.bytes / elapsed / 1_048_576:.2f} MB/s")
+        print(f"  - Retries (429): {self.retries}")
+        print(f"  - Elapsed: {self.elapsed:.1f}s")
+        for sample in self.error_samples:
+            print(f"  ✗ {sample}")
+
+
+class BulkIndexer:
+    """
+    Ship bulk operations to Elasticsearch from a small thread pool.
+
+    Operations are serialized once and grouped by count and bytes
+    (ES_BULK_CHUNK_SIZE / ES_BULK_MAX_CHUNK_BYTES). Requests or items
+    rejected with 429 are retried with exponential backoff; other item
+    failures are counted and sampled into the report instead of printed.
+    """
+
+    def __init__(self, es: Elasticsearch, threads: Optional[int] = None,
+                 chunk_size: Optional[int] = None, max_chunk_bytes: Optional[int] = None,
+                 max_retries: Optional[int] = None, initial_backoff: Optional[float] = None,
+                 max_backoff: float = 60.0):
+        self.es = es
+        self.threads = threads or settings.ES_BULK_THREADS
+        self.chunk_size = chunk_size or settings.ES_BULK_CHUNK_SIZE
+        self.max_chunk_bytes = max_chunk_bytes or settings.ES_BULK_MAX_CHUNK_BYTES
+        self.max_retries = settings.ES_BULK_MAX_RETRIES if max_retries is None else max_retries
+        self.initial_backoff = initial_backoff or settings.ES_BULK_INITIAL_BACKOFF
+        self.max_backoff = max_backoff
+
+    def index(self, actions: Iterable[Dict]) -> BulkReport:
+        """Serialize, chunk and ship a stream of helpers-style action dicts"""
+        ops = (serialize_action(action) for action in actions)
+        return self.index_chunks(chunk_ops(ops, self.chunk_size, self.max_chunk_bytes))
+
+    def index_chunks(self, chunks: Iterable[List[BulkOp]]) -> BulkReport:
+        """Ship pre-serialized chunks, keeping at most 2x threads requests in flight"""
+        report = BulkReport()
+        start = time.monotonic()
+
+        if self.threads <= 1:
+            for chunk in chunks:
+                report.merge(self._send_chunk(chunk))
+        else:
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                in_flight = set()
+                for chunk in chunks:
+                    if len(in_flight) >= self.threads * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            report.merge(future.result())
+                    in_flight.add(pool.submit(self._send_chunk, chunk))
+                for future in in_flight:
+                    report.merge(future.result())
+
+        report.elapsed = time.monotonic() - start
+        return report
+
+    def _backoff(self, attempt: int):
+        time.sleep(min(self.max_backoff, self.initial_backoff * (2 ** (attempt - 1))))
+
+    def _send_chunk(self, chunk: List[BulkOp]) -> BulkReport:
+        """Send one chunk, retrying rejected (429) requests and items"""
+        report = BulkReport(chunks=1)
+        pending = chunk
+        attempt = 0
+
+        while pending:
+            lines = []
+            for action, source in pending:
+                lines.append(action)
+                if source is not None:
+                    lines.append(source)
+
+            try:
+                response = self.es.bulk(operations=lines)
+            except ApiError as e:
+                if e.meta.status == 429 and attempt < self.max_retries:
+                    attempt += 1
+                    report.retries += len(pending)
+                    self._backoff(attempt)
+                    continue
+                report.errors += len(pending)
+                report.error_samples.append(f"Bulk request failed: {e}")
+                break
+
+            report.bytes += sum(op_size(op) for op in pending)
+            rejected = []
+            for op, item in zip(pending, response['items']):
+                info = next(iter(item.values()))
+                if 'error' not in info:
+                    report.docs += 1
+                elif info.get('status') == 429 and attempt < self.max_retries:
+                    rejected.append(op)
+                else:
+                    report.errors += 1
+                    if len(report.error_samples) < 10:
+                        reason = info['error'].get('reason') if isinstance(info['error'], dict) else info['error']
+                        report.error_samples.append(f"{info.get('_id')}: {reason}")
+
+            if rejected:
+                attempt += 1
+                report.retries += len(rejected)
+                self._backoff(attempt)
+            pending = rejected
+
+        return report
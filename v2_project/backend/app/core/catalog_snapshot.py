@@ -0,0 +1,186 @@
+"""
+Catalog Snapshot Format
+Typed Parquet snapshot of the scraped catalog, shared by the scraper, the
+converters and the product ingesters.
+
+This module only depends on pyarrow and the standard library so the scraper
+can import it without the backend settings.
+"""
+import json
+import math
+from typing import Dict, Iterable, Iterator, List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+LIST_FIELDS = (
+    "certificates",
+    "suitable_accessories",
+    "image_urls",
+    "local_image_paths",
+    "technical_drawing_urls",
+    "local_technical_drawing_paths",
+)
+
+CATALOG_SCHEMA = pa.schema([
+    ("part_number", pa.string()),
+    ("url", pa.string()),
+    ("name", pa.string()),
+    ("description", pa.string()),
+    ("category", pa.string()),
+    ("actual_part_no", pa.string()),
+    ("price_teaser", pa.string()),
+    ("phased_out", pa.bool_()),
+    ("successor_product", pa.string()),
+    ("certificates", pa.list_(pa.string())),
+    ("specifications", pa.map_(pa.string(), pa.string())),
+    ("suitable_accessories", pa.list_(pa.string())),
+    ("image_urls", pa.list_(pa.string())),
+    ("local_image_paths", pa.list_(pa.string())),
+    ("technical_drawing_urls", pa.list_(pa.string())),
+    ("local_technical_drawing_paths", pa.list_(pa.string())),
+    ("pdf_url", pa.string()),
+])
+
+
+def _is_missing(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return isinstance(value, str) and value.strip() in ("", "N/A")
+
+
+def _to_text(value) -> Optional[str]:
+    return None if _is_missing(value) else str(value).strip()
+
+
+def _to_list(value) -> List[str]:
+    if _is_missing(value):
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if not _is_missing(item)]
+    return [item.strip() for item in str(value).split('|') if item.strip()]
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('yes', 'true', '1')
+
+
+def _to_specs(value) -> List:
+    if _is_missing(value):
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    if not isinstance(value, dict):
+        return []
+    return [(str(k), str(v)) for k, v in value.items() if not _is_missing(v)]
+
+
+def normalize_record(record: Dict) -> Dict:
+    """
+    Coerce a scraper/CSV/JSON product row into snapshot types.
+
+    Accepts pipe-delimited or list fields, JSON-string or dict specifications
+    and Yes/No or boolean phased_out values.
+    """
+    row = {}
+    for field in CATALOG_SCHEMA:
+        value = record.get(field.name)
+        if field.name in LIST_FIELDS:
+            row[field.name] = _to_list(value)
+        elif field.name == "specifications":
+            row[field.name] = _to_specs(value)
+        elif field.name == "phased_out":
+            row[field.name] = _to_bool(value) if value is not None else False
+        else:
+            row[field.name] = _to_text(value)
+    return row
+
+
+def to_catalog_record(record: Dict) -> Dict:
+    """
+    Normalize a product row from any source the way a snapshot round trip
+    would (missing values None or empty, specifications as a dict), so
+    ingest builds the same document, and content hash, from CSV, JSON and
+    snapshot input. Fields outside the schema are kept as they are.
+    """
+    row = {**record, **normalize_record(record)}
+    row["specifications"] = dict(row["specifications"])
+    return row
+
+
+class SnapshotWriter:
+    """Write normalized catalog rows to Parquet in row groups"""
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows: List[Dict] = []
+        self.count = 0
+        self._writer = pq.ParquetWriter(path, CATALOG_SCHEMA, compression="zstd")
+
+    def write(self, record: Dict):
+        self.rows.append(normalize_record(record))
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self._writer.write_table(pa.Table.from_pylist(self.rows, schema=CATALOG_SCHEMA))
+            self.count += len(self.rows)
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_snapshot(records: Iterable[Dict], path: str) -> int:
+    """Write product rows to a snapshot file and return the row count"""
+    with SnapshotWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def iter_snapshot_batches(path: str, columns: Optional[List[str]] = None,
+                          batch_size: int = 1000) -> Iterator[pa.RecordBatch]:
+    """
+    Stream record batches with part numbers trimmed and empty ones dropped.
+
+    The filtering runs as vectorized Arrow compute on each batch.
+    """
+    parquet = pq.ParquetFile(path)
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+        if "part_number" not in batch.schema.names:
+            yield batch
+            continue
+        table = pa.Table.from_batches([batch])
+        index = table.schema.get_field_index("part_number")
+        part_numbers = pc.utf8_trim_whitespace(table.column(index))
+        table = table.set_column(index, "part_number", part_numbers)
+        table = table.filter(pc.fill_null(pc.not_equal(part_numbers, ""), False))
+        yield from table.to_batches()
+
+
+def iter_snapshot_records(path: str, columns: Optional[List[str]] = None,
+                          batch_size: int = 1000) -> Iterator[Dict]:
+    """Yield snapshot rows as dicts (specifications as a dict)"""
+    for batch in iter_snapshot_batches(path, columns, batch_size):
+        for row in batch.to_pylist():
+            if "specifications" in row:
+                row["specifications"] = dict(row["specifications"] or [])
+            yield row
+
@@ -0,0 +1,188 @@
+"""
+Datasheet Chunk Vectorizer
+Embed datasheet chunks in batches and upsert them to Qdrant in batches
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from app.core.config import settings
+from app.core.embeddings import OllamaEmbedder
+
+# Chunk fields copied into the Qdrant payload (TechDoc reads these back)
+PAYLOAD_FIELDS = [
+    "part_number",
+    "product_name",
+    "chunk_id",
+    "pdf_hash",
+    "part_numbers",
+    "chunk_text",
+    "chunk_index",
+    "chunk_type",
+    "pdf_url",
+    "page_start",
+    "page_end",
+    "page_hint",
+]
+
+
+def chunk_point_id(chunk_id: str) -> str:
+    """Qdrant point id for a chunk: its md5 chunk_id read as a UUID"""
+    return str(uuid.UUID(hex=chunk_id))
+
+
+def embedding_signature() -> str:
+    """Identifies the vector space; stored vectors are only reused when it matches"""
+    return f"{settings.OLLAMA_EMBEDDING_MODEL}/{settings.QDRANT_VECTOR_SIZE}"
+
+
+class ChunkVectorizer:
+    """
+    Buffer chunk documents and vectorize them in the background.
+
+    Every PDF_EMBED_BATCH chunks become one multi-input embedding request,
+    run on PDF_EMBEDDING_WORKERS threads so extraction and bulk indexing keep
+    going meanwhile. Points are upserted QDRANT_UPSERT_BATCH at a time.
+    Chunks that were already embedded can be passed to reuse() instead,
+    which copies their vectors from another collection. Call close() to
+    flush the remainder. `vectorized` counts newly embedded chunks, `reused`
+    copied ones, `stored` points written and `errors` chunks lost.
+    """
+
+    def __init__(self, qdrant: QdrantClient, collection_name: str,
+                 embedder: Optional[OllamaEmbedder] = None,
+                 embed_batch: Optional[int] = None, upsert_batch: Optional[int] = None,
+                 workers: Optional[int] = None):
+        self.qdrant = qdrant
+        self.collection_name = collection_name
+        self.embedder = embedder or OllamaEmbedder()
+        self.embed_batch = embed_batch or settings.PDF_EMBED_BATCH
+        self.upsert_batch = upsert_batch or settings.QDRANT_UPSERT_BATCH
+        self.workers = workers or settings.PDF_EMBEDDING_WORKERS
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.in_flight = set()
+        self.signature = embedding_signature()
+        self.pending: List[Dict] = []
+        self.reuse_pending: List[Dict] = []
+        self.reuse_source: Optional[str] = None
+        self.points: List[PointStruct] = []
+        self.vectorized = 0
+        self.reused = 0
+        self.stored = 0
+        self.errors = 0
+
+    def add(self, doc: Dict):
+        """Queue a chunk document (as indexed in Elasticsearch)"""
+        self.pending.append(doc)
+        if len(self.pending) >= self.embed_batch:
+            self._submit()
+
+    def reuse(self, doc: Dict, source_collection: str):
+        """Queue a chunk whose vector should be copied from `source_collection`"""
+        if self.reuse_source not in (None, source_collection):
+            self._copy()
+        self.reuse_source = source_collection
+        self.reuse_pending.append(doc)
+        if len(self.reuse_pending) >= self.upsert_batch:
+            self._copy()
+
+    def _copy(self):
+        """Copy queued vectors; chunks without a matching stored vector are embedded"""
+        docs, self.reuse_pending = self.reuse_pending, []
+        if not docs:
+            return
+        try:
+            records = self.qdrant.retrieve(
+                collection_name=self.reuse_source,
+                ids=[chunk_point_id(doc['chunk_id']) for doc in docs],
+                with_payload=["embedding"],
+                with_vectors=True
+            )
+        except Exception as e:
+            print(f"  ✗ Could not read stored vectors from '{self.reuse_source}': {e}")
+            records = []
+
+        vectors = {
+            str(record.id): record.vector
+            for record in records
+            if record.vector and (record.payload or {}).get("embedding") == self.signature
+        }
+        for doc in docs:
+            vector = vectors.get(chunk_point_id(doc['chunk_id']))
+            if vector is None:
+                self.add(doc)
+                continue
+            self.points.append(self._point(doc, vector))
+            self.reused += 1
+        self._flush_points()
+
+    def _point(self, doc: Dict, vector: List[float]) -> PointStruct:
+        payload = {key: doc.get(key) for key in PAYLOAD_FIELDS}
+        payload["embedding"] = self.signature
+        return PointStruct(id=chunk_point_id(doc['chunk_id']), vector=vector, payload=payload)
+
+    def _submit(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        # Bound the queue so a slow embedder applies back-pressure
+        if len(self.in_flight) >= self.workers * 2:
+            done, self.in_flight = wait(self.in_flight, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        self.in_flight.add(self.pool.submit(self._embed, batch))
+
+    def _embed(self, batch: List[Dict]) -> List[Optional[PointStruct]]:
+        try:
+            vectors = self.embedder.embed([doc['chunk_text'] for doc in batch])
+        except Exception as e:
+            print(f"  ✗ Embedding batch failed ({len(batch)} chunks): {e}")
+            vectors = [None] * len(batch)
+
+        return [self._point(doc, vector) if vector else None for doc, vector in zip(batch, vectors)]
+
+    def _collect(self, futures):
+        for future in futures:
+            for point in future.result():
+                if point is None:
+                    self.errors += 1
+                else:
+                    self.points.append(point)
+                    self.vectorized += 1
+        self._flush_points()
+
+    def _flush_points(self):
+        while len(self.points) >= self.upsert_batch:
+            self._upsert(self.points[:self.upsert_batch])
+            self.points = self.points[self.upsert_batch:]
+
+    def _upsert(self, points: List[PointStruct]):
+        try:
+            self.qdrant.upsert(collection_name=self.collection_name, points=points)
+            self.stored += len(points)
+        except Exception as e:
+            print(f"  ✗ Qdrant upsert failed ({len(points)} points): {e}")
+            self.errors += len(points)
+
+    def set_part_numbers(self, chunk_ids: List[str], part_numbers: List[str]):
+        """Update the part list of stored chunks (call after close())"""
+        try:
+            self.qdrant.set_payload(
+                collection_name=self.collection_name,
+                payload={"part_numbers": part_numbers},
+                points=[chunk_point_id(chunk_id) for chunk_id in chunk_ids]
+            )
+        except Exception as e:
+            print(f"  ✗ Qdrant payload update failed ({len(chunk_ids)} points): {e}")
+
+    def close(self):
+        """Copy, embed and upsert everything still buffered"""
+        self._copy()
+        self._submit()
+        self._collect(list(self.in_flight))
+        self.in_flight = set()
+        if self.points:
+            self._upsert(self.points)
+            self.points = []
+        self.pool.shutdown()
@@ -0,0 +1,115 @@
+"""
+Embedding Dimension Recall Comparison
+Measure how much recall truncated (Matryoshka) embeddings lose against the
+full-dimension product collection, to pick the cheapest QDRANT_VECTOR_SIZE.
+
+Usage: python -m app.core.compare_embedding_dims --dims 256 512 --sample 2000
+"""
+import sys
+import random
+import argparse
+from typing import List, Dict
+import numpy as np
+import requests
+from qdrant_client import QdrantClient
+
+from app.core.config import settings, get_qdrant_url
+
+
+def load_sample(qdrant: QdrantClient, collection: str, sample: int) -> List:
+    """Scroll up to `sample` points (with vectors) from the full collection"""
+    points = []
+    offset = None
+    while len(points) < sample:
+        batch, offset = qdrant.scroll(
+            collection_name=collection,
+            limit=min(256, sample - len(points)),
+            offset=offset,
+            with_vectors=True,
+            with_payload=True
+        )
+        points.extend(p for p in batch if p.vector)
+        if offset is None:
+            break
+    return points
+
+
+def embed_query(text: str) -> List[float]:
+    """Embed a query at full model dimension (no truncation)"""
+    response = requests.post(
+        f"{settings.OLLAMA_HOST}/api/embeddings",
+        json={"model": settings.OLLAMA_EMBEDDING_MODEL, "prompt": text},
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json()['embedding']
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def recall_at_k(corpus: np.ndarray, queries: np.ndarray, dims: int, k: int) -> float:
+    """Mean overlap of exact top-k at `dims` with exact top-k at full dimension"""
+    full_top = np.argsort(-(normalize(queries) @ normalize(corpus).T), axis=1)[:, :k]
+    reduced_scores = normalize(queries[:, :dims]) @ normalize(corpus[:, :dims]).T
+    reduced_top = np.argsort(-reduced_scores, axis=1)[:, :k]
+
+    overlaps = [len(set(a) & set(b)) / k for a, b in zip(full_top, reduced_top)]
+    return float(np.mean(overlaps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recall of truncated embedding dimensions")
+    parser.add_argument("--collection", default=settings.QDRANT_PRODUCTS_COLLECTION,
+                        help="Full-dimension collection (or alias) to sample from")
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--sample", type=int, default=2000, help="Corpus points to sample")
+    parser.add_argument("--queries", type=int, default=100, help="Product names used as queries")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("📐 Embedding Dimension Recall Comparison")
+    print("=" * 70)
+
+    qdrant = QdrantClient(url=get_qdrant_url())
+    points = load_sample(qdrant, args.collection, args.sample)
+    if not points:
+        print(f"❌ No vectors found in '{args.collection}'")
+        return 1
+
+    corpus = np.array([p.vector for p in points], dtype=np.float32)
+    full_dims = corpus.shape[1]
+    if full_dims < settings.EMBEDDING_FULL_DIMENSIONS:
+        print(f"❌ '{args.collection}' stores {full_dims}-d vectors; compare against a full "
+              f"{settings.EMBEDDING_FULL_DIMENSIONS}-d collection")
+        return 1
+    print(f"✅ Sampled {len(points)} vectors ({full_dims} dims) from '{args.collection}'")
+
+    names = [p.payload.get('name') for p in points if p.payload and p.payload.get('name')]
+    random.seed(42)
+    query_texts = random.sample(names, min(args.queries, len(names)))
+    print(f"⏳ Embedding {len(query_texts)} queries...")
+    queries = np.array([embed_query(t) for t in query_texts], dtype=np.float32)
+
+    results: Dict[int, float] = {}
+    for dims in sorted(args.dims):
+        if dims >= full_dims:
+            continue
+        results[dims] = recall_at_k(corpus, queries, dims, args.k)
+
+    print(f"\n📊 Recall@{args.k} vs {full_dims}-d (higher is better):")
+    for dims, recall in results.items():
+        ram_share = dims / full_dims
+        print(f"  - {dims:>4} dims: recall {recall:.3f} | vector RAM {ram_share:.0%} of full")
+
+    print("\nSet QDRANT_VECTOR_SIZE to the smallest dimension with acceptable recall,")
+    print("then rebuild with generate_embeddings and process_pdfs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,19 +14,60 @@ class Settings(BaseSettings):
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     API_CORS_ORIGINS: list = ["*"]
+    ADMIN_API_TOKEN: Optional[str] = os.getenv("ADMIN_API_TOKEN")  # /api/admin/* is disabled unless set
+    # Event loop monitor (opt-in): lag sampling plus stack capture of blocking code
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL: float = 0.1  # Seconds between heartbeats
+    LOOP_MONITOR_THRESHOLD: float = 0.25  # Seconds the loop may be blocked before a stack is logged
+    LOOP_MONITOR_ASYNCIO_DEBUG: bool = False  # Also log slow callbacks via asyncio debug mode (costly)
     
     # Elasticsearch Settings
     ES_HOST: str = os.getenv("ES_HOST", "localhost")
     ES_PORT: int = 9200
+    # Index names are aliases onto versioned indices ({name}_v{n})
     ES_PRODUCTS_INDEX: str = "sick_products"
     ES_PDF_INDEX: str = "sick_datasheets"
+    ES_KEEP_VERSIONS: int = 1  # Old index versions kept for rollback
+    ES_MIN_DOC_RATIO: float = 0.9  # Build must hold this share of the live doc count
+    # Facets returned by SearchService.facets: "terms" counts values of `field`,
+    # "spec" reports the min/max of a normalized numeric spec (spec_num.<spec>)
+    SEARCH_FACETS: dict = {
+        "category": {"type": "terms", "field": "category.keyword", "size": 100},
+        "brand": {"type": "terms", "field": "brand", "size": 50},
+        "certificates": {"type": "terms", "field": "certificates", "size": 50},
+        "phased_out": {"type": "terms", "field": "phased_out", "size": 2},
+        "supply_voltage": {"type": "spec", "spec": "supply_voltage"},
+        "sensing_range": {"type": "spec", "spec": "sensing_range"},
+    }
+    FACET_GENERATION_TTL: int = 30  # Seconds between catalog generation checks
+    SEARCH_PIT_KEEP_ALIVE: str = "5m"  # How long a result cursor stays valid between pages
+    ES_MSEARCH_WINDOW_MS: float = 3.0  # Coalescing window for concurrent searches (0 = off)
+    ES_MSEARCH_MAX_BATCH: int = 50  # Searches per _msearch request
     
     # Qdrant Settings
     QDRANT_HOST: str = os.getenv("QDRANT_HOST", "localhost")
     QDRANT_PORT: int = 6333
+    # Collection names are aliases onto versioned collections ({name}_v{n})
     QDRANT_PRODUCTS_COLLECTION: str = "sick_products_vectors"
     QDRANT_PDF_COLLECTION: str = "sick_datasheets_vectors"
-    QDRANT_VECTOR_SIZE: int = 768  # nomic-embed-text dimension
+    EMBEDDING_FULL_DIMENSIONS: int = 768  # nomic-embed-text output dimension
+    # Stored/queried dimension. nomic-embed-text is Matryoshka-trained, so 512
+    # or 256 keeps most of the quality; vectors are truncated and renormalized.
+    QDRANT_VECTOR_SIZE: int = 768
+    QDRANT_KEEP_VERSIONS: int = 1  # Old collection versions kept for rollback
+    QDRANT_MIN_POINT_RATIO: float = 0.9  # Build must hold this share of the live point count
+    QDRANT_MAX_ERROR_RATIO: float = 0.05  # Builds with a higher share of failed embeddings are rejected
+    QDRANT_QUANTIZATION: bool = True  # int8 scalar quantization with rescoring
+    QDRANT_ON_DISK_VECTORS: bool = True  # Keep float32 originals on disk
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_SEARCH_HNSW_EF: int = 128
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+    
+    # TechDoc Settings (datasheet retrieval: BM25 + vector, fused and reranked)
+    TECHDOC_CANDIDATES: int = 20  # Chunks fetched from each of BM25 and vector search
+    TECHDOC_RRF_K: int = 60  # Reciprocal rank fusion constant
+    TECHDOC_RERANK_TOP_N: int = 20  # Fused chunks passed to the reranker
     
     # Ollama Settings
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
@@ -53,14 +94,34 @@ class Settings(BaseSettings):
     # Data Settings
     DATA_DIR: str = os.getenv("DATA_DIR", "/data")
     PRODUCTS_CSV: str = "products.csv"
+    PRODUCTS_JSON: str = os.getenv("PRODUCTS_JSON", "products.json")  # .json array or .jsonl
+    PRODUCT_GRAPH_FILE: str = "product_graph.json"  # Successor/accessory graph written by ingest
+    PRODUCTS_BRAND: str = "SICK"  # Brand for catalog rows that don't name one
     IMAGES_DIR: str = "scraped_data/images"
     PDF_DOWNLOAD_DIR: str = "pdfs"
     
     # Processing Settings
     BATCH_SIZE: int = 50  # For embeddings
+    EMBEDDING_WORKERS: int = 1  # Parallel sliced-scroll workers for product embedding
+    PDF_EMBED_BATCH: int = 64  # Datasheet chunks per Ollama /api/embed request
+    PDF_EMBEDDING_WORKERS: int = 1  # Threads embedding datasheet chunk batches
+    QDRANT_UPSERT_BATCH: int = 256  # Points per Qdrant upsert
     PDF_CHUNK_SIZE: int = 1000  # Characters per chunk
     PDF_CHUNK_OVERLAP: int = 200
+    PDF_WORKERS: int = 0  # PDF text extraction processes (0 = one per CPU core)
+    PDF_EXTRACT_TIMEOUT: int = 120  # Seconds allowed per PDF before it is skipped
+    PDF_DOWNLOAD_CONCURRENCY: int = 16  # Concurrent datasheet downloads
+    PDF_DOWNLOAD_PER_HOST: int = 4  # Concurrent downloads per host
+    PDF_DOWNLOAD_RETRIES: int = 4
+    PDF_DOWNLOAD_BACKOFF: float = 1.0  # Seconds, doubled per retry and jittered
     MAX_RETRIES: int = 3
+    ES_BULK_THREADS: int = 2  # Concurrent bulk requests
+    ES_BULK_CHUNK_SIZE: int = 500  # Max operations per bulk request
+    ES_BULK_MAX_CHUNK_BYTES: int = 10 * 1024 * 1024  # Max bytes per bulk request
+    ES_BULK_MAX_RETRIES: int = 5  # Retries for 429 (queue full) rejections
+    ES_BULK_INITIAL_BACKOFF: float = 2.0  # Seconds, doubled per retry
+    INGEST_WORKERS: int = 0  # CSV parse processes (0 = one per CPU core)
+    INGEST_RANGE_BYTES: int = 8 * 1024 * 1024  # CSV bytes parsed per worker task
     TIMEOUT: int = 30  # seconds
     
     class Config:
@@ -87,6 +148,16 @@ def get_products_csv_path() -> str:
     return os.path.join(settings.DATA_DIR, settings.PRODUCTS_CSV)
 
 
+def get_products_json_path() -> str:
+    """Get full path to products JSON / JSON Lines file"""
+    return os.path.join(settings.DATA_DIR, settings.PRODUCTS_JSON)
+
+
+def get_product_graph_path() -> str:
+    """Get full path to the product substitution graph"""
+    return os.path.join(settings.DATA_DIR, settings.PRODUCT_GRAPH_FILE)
+
+
 def get_images_dir_path() -> str:
     """Get full path to images directory"""
     return os.path.join(settings.DATA_DIR, settings.IMAGES_DIR)
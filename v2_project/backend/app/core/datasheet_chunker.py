@@ -0,0 +1,164 @@
+"""
+Datasheet Chunker
+Split extracted datasheet pages into retrieval chunks along page, paragraph,
+line and table boundaries
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Bump when chunking output changes, so indexed chunks are rebuilt
+CHUNKER_VERSION = 1
+# Lines within this many lines of the top/bottom of a page can be headers/footers
+EDGE_LINES = 3
+# A line is repeated boilerplate if it sits on the edge of this share of pages
+REPEATED_LINE_RATIO = 0.5
+
+
+def _line_key(line: str) -> str:
+    """Normalize a line so 'Page 2 of 9' and 'Page 3 of 9' compare equal"""
+    return re.sub(r"\d+", "#", line.strip().lower())
+
+
+def find_repeated_lines(pages: List[Dict]) -> set:
+    """Line keys that appear at the top or bottom of most pages"""
+    if len(pages) < 3:
+        return set()
+
+    counts = Counter()
+    for page in pages:
+        lines = [l for l in (page.get("text") or "").splitlines() if l.strip()]
+        edges = lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+        counts.update({_line_key(l) for l in edges})
+
+    threshold = max(2, len(pages) * REPEATED_LINE_RATIO)
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def strip_repeated_lines(text: str, repeated: set) -> str:
+    """Remove header/footer lines from the edges of one page's text"""
+    lines = text.splitlines()
+    keep = [True] * len(lines)
+    non_empty = [i for i, l in enumerate(lines) if l.strip()]
+    for i in non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:]:
+        if _line_key(lines[i]) in repeated:
+            keep[i] = False
+    return "\n".join(l for l, k in zip(lines, keep) if k)
+
+
+def _split_long_line(line: str, chunk_size: int) -> List[str]:
+    """Split an over-long line at word boundaries"""
+    pieces, current = [], ""
+    for word in line.split(" "):
+        if current and len(current) + 1 + len(word) > chunk_size:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def render_table(rows: List[List[Optional[str]]]) -> List[str]:
+    """Render table rows as 'cell | cell' lines, dropping empty rows"""
+    lines = []
+    for row in rows:
+        cells = [" ".join((cell or "").split()) for cell in row]
+        if any(cells):
+            lines.append(" | ".join(cells))
+    return lines
+
+
+class DatasheetChunker:
+    """
+    Build chunks from pages of {"number", "text", "tables"}.
+
+    Text chunks fill up to `chunk_size` characters, breaking between
+    paragraphs where possible and otherwise between lines, never inside a
+    word; consecutive chunks share up to `overlap` characters of whole lines.
+    Each table becomes its own chunk (split by rows with the header repeated
+    when large). Headers and footers repeated across pages are dropped.
+    """
+
+    def __init__(self, chunk_size: int = 1000, overlap: int = 200):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    @property
+    def signature(self) -> str:
+        """Identifies the chunking output; chunks are only reused when it matches"""
+        return f"v{CHUNKER_VERSION}/{self.chunk_size}/{self.overlap}"
+
+    def chunk_pages(self, pages: List[Dict]) -> List[Dict]:
+        repeated = find_repeated_lines(pages)
+        chunks = []
+        lines: List[tuple] = []  # (page number, line) of the open chunk
+        fresh = 0  # lines in the open chunk that aren't overlap from the previous one
+
+        def make_room(needed: int):
+            nonlocal lines, fresh
+            if self._size(lines) + needed <= self.chunk_size:
+                return
+            lines = self._emit(chunks, lines) if fresh else []
+            fresh = 0
+            if self._size(lines) + needed > self.chunk_size:
+                lines = []
+
+        for page in pages:
+            text = strip_repeated_lines(page.get("text") or "", repeated)
+            for paragraph in re.split(r"\n\s*\n", text):
+                paragraph_lines = [l.strip() for l in paragraph.splitlines() if l.strip()]
+                if not paragraph_lines:
+                    continue
+                # Prefer closing the chunk between paragraphs over splitting one
+                paragraph_size = sum(len(l) + 1 for l in paragraph_lines)
+                if paragraph_size <= self.chunk_size:
+                    make_room(paragraph_size)
+                for line in paragraph_lines:
+                    for piece in _split_long_line(line, self.chunk_size):
+                        make_room(len(piece) + 1)
+                        lines.append((page["number"], piece))
+                        fresh += 1
+
+            for table in page.get("tables") or []:
+                chunks.extend(self.table_chunks(table, page["number"]))
+
+        if fresh:
+            self._emit(chunks, lines)
+        return chunks
+
+    def table_chunks(self, rows: List[List[Optional[str]]], page_number: int) -> List[Dict]:
+        """One chunk per table, split by rows (header repeated) if it is large"""
+        lines = render_table(rows)
+        if not lines:
+            return []
+
+        header, body = lines[0], lines[1:]
+        chunks, current = [], [header]
+        for line in body:
+            if len(current) > 1 and sum(len(l) + 1 for l in current) + len(line) > self.chunk_size:
+                chunks.append(self._chunk("\n".join(current), page_number, page_number, "table"))
+                current = [header]
+            current.append(line)
+        chunks.append(self._chunk("\n".join(current), page_number, page_number, "table"))
+        return chunks
+
+    @staticmethod
+    def _size(lines: List[tuple]) -> int:
+        return sum(len(line) + 1 for _, line in lines)
+
+    def _emit(self, chunks: List[Dict], lines: List[tuple]) -> List[tuple]:
+        """Append a text chunk and return the trailing lines to overlap into the next"""
+        chunks.append(self._chunk("\n".join(l for _, l in lines), lines[0][0], lines[-1][0], "text"))
+        tail, size = [], 0
+        for page_number, line in reversed(lines[1:]):
+            if size + len(line) + 1 > self.overlap:
+                break
+            tail.insert(0, (page_number, line))
+            size += len(line) + 1
+        return tail
+
+    @staticmethod
+    def _chunk(text: str, page_start: int, page_end: int, chunk_type: str) -> Dict:
+        return {"text": text, "page_start": page_start, "page_end": page_end, "chunk_type": chunk_type}
@@ -0,0 +1,171 @@
+"""
+Datasheet Retrieval
+Hybrid BM25 + vector search over datasheet chunks with rank fusion and a
+lightweight lexical reranker (Async)
+"""
+import asyncio
+import re
+from typing import Dict, List, Optional
+from elasticsearch import AsyncElasticsearch
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Filter, FieldCondition, MatchAny
+import logging
+
+from .config import settings, get_es_url, get_qdrant_url
+from .qdrant_collections import get_collection_profile
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,/-][a-z0-9]+)*")
+# Question words that carry no retrieval signal
+_STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "which",
+    "with", "where", "why", "you",
+}
+
+
+def query_terms(text: str) -> List[str]:
+    """Lowercased content terms of a query, in order, without duplicates"""
+    terms = [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+    return list(dict.fromkeys(terms))
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: Optional[int] = None) -> List[Dict]:
+    """
+    Merge ranked chunk lists by reciprocal rank (sum of 1 / (k + rank)).
+
+    Ranks are comparable across BM25 and cosine scores where raw scores are
+    not. Each chunk keeps its first-seen fields plus `rrf_score`.
+    """
+    k = k or settings.TECHDOC_RRF_K
+    fused: Dict[str, Dict] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, 1):
+            entry = fused.setdefault(chunk['chunk_id'], {**chunk, "rrf_score": 0.0})
+            entry['rrf_score'] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda c: c['rrf_score'], reverse=True)
+
+
+def rerank_chunks(query: str, chunks: List[Dict], part_numbers: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Rescore fused chunks on the CPU without a model.
+
+    Combines the fused rank with how many query terms the chunk contains
+    (numbers and part-like tokens count double, since spec questions hinge
+    on them), an exact-phrase bonus and a bonus for the asked-about part.
+    """
+    terms = query_terms(query)
+    weights = {t: 2.0 if any(c.isdigit() for c in t) else 1.0 for t in terms}
+    total_weight = sum(weights.values()) or 1.0
+    phrase = " ".join(terms)
+    top_rrf = max((c['rrf_score'] for c in chunks), default=0) or 1.0
+    wanted = set(part_numbers or [])
+
+    for chunk in chunks:
+        text = (chunk.get('chunk_text') or "").lower()
+        tokens = set(_TOKEN_RE.findall(text))
+        coverage = sum(w for t, w in weights.items() if t in tokens) / total_weight
+        score = 0.4 * chunk['rrf_score'] / top_rrf + 0.5 * coverage
+        if len(terms) > 1 and phrase in text:
+            score += 0.1
+        if wanted and wanted & set(chunk.get('part_numbers') or [chunk.get('part_number')]):
+            score += 0.1
+        chunk['rerank_score'] = score
+    return sorted(chunks, key=lambda c: c['rerank_score'], reverse=True)
+
+
+class DatasheetRetriever:
+    """
+    Find the datasheet chunks that best answer a question.
+
+    BM25 over the `sick_datasheets` index (exact spec terms, part numbers)
+    and vector search over the datasheet collection (paraphrases) each
+    return TECHDOC_CANDIDATES chunks, restricted to the given part numbers
+    when any were detected. The lists are fused with reciprocal rank fusion
+    and the top TECHDOC_RERANK_TOP_N are reranked.
+    """
+
+    def __init__(self):
+        self.es = AsyncElasticsearch([get_es_url()])
+        self.qdrant = AsyncQdrantClient(url=get_qdrant_url())
+        self.profile = get_collection_profile(settings.QDRANT_PDF_COLLECTION)
+
+    @staticmethod
+    def _part_clause(part_numbers: List[str]) -> Dict:
+        # Older builds only have the single `part_number` field
+        return {
+            "bool": {
+                "should": [
+                    {"terms": {"part_numbers": part_numbers}},
+                    {"terms": {"part_number": part_numbers}},
+                ],
+                "minimum_should_match": 1
+            }
+        }
+
+    async def bm25_search(self, query: str, part_numbers: Optional[List[str]] = None,
+                          size: Optional[int] = None) -> List[Dict]:
+        body = {
+            "query": {
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": query,
+                            "fields": ["chunk_text", "product_name^0.5"]
+                        }
+                    },
+                    "filter": [self._part_clause(part_numbers)] if part_numbers else []
+                }
+            },
+            "size": size or settings.TECHDOC_CANDIDATES
+        }
+        try:
+            result = await self.es.search(index=settings.ES_PDF_INDEX, body=body)
+        except Exception as e:
+            logger.error(f"Datasheet BM25 search error: {e}")
+            return []
+        return [hit['_source'] for hit in result['hits']['hits'] if hit['_source'].get('chunk_id')]
+
+    def _vector_filter(self, part_numbers: Optional[List[str]]) -> Optional[Filter]:
+        if not part_numbers:
+            return None
+        return Filter(should=[
+            FieldCondition(key="part_numbers", match=MatchAny(any=part_numbers)),
+            FieldCondition(key="part_number", match=MatchAny(any=part_numbers)),
+        ])
+
+    async def vector_search(self, query_vector: List[float], part_numbers: Optional[List[str]] = None,
+                            limit: Optional[int] = None) -> List[Dict]:
+        if not query_vector:
+            return []
+        try:
+            results = await self.qdrant.search(
+                collection_name=settings.QDRANT_PDF_COLLECTION,
+                query_vector=query_vector,
+                query_filter=self._vector_filter(part_numbers),
+                search_params=self.profile.search_params(),
+                limit=limit or settings.TECHDOC_CANDIDATES
+            )
+        except Exception as e:
+            logger.error(f"Datasheet vector search error: {e}")
+            return []
+        return [hit.payload for hit in results if hit.payload.get('chunk_id')]
+
+    async def search(self, query: str, query_vector: Optional[List[float]], limit: int = 3,
+                     part_numbers: Optional[List[str]] = None) -> List[Dict]:
+        """Top `limit` chunks for `query` (fused, reranked; best first)"""
+        bm25, vectors = await asyncio.gather(
+            self.bm25_search(query, part_numbers),
+            self.vector_search(query_vector, part_numbers)
+        )
+        fused = reciprocal_rank_fusion([bm25, vectors])
+        if not fused and part_numbers:
+            # The part may have no datasheet indexed; answer from all manuals
+            return await self.search(query, query_vector, limit)
+        top = fused[:settings.TECHDOC_RERANK_TOP_N]
+        return rerank_chunks(query, top, part_numbers)[:limit]
+
+    async def close(self):
+        await self.es.close()
+        await self.qdrant.close()
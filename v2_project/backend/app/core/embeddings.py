@@ -0,0 +1,78 @@
+"""
+Embedding Helpers
+Shared Ollama embedding calls and post-processing (Matryoshka dimension reduction)
+"""
+import math
+from typing import List, Optional
+import requests
+
+from app.core.config import settings
+
+
+def prepare_embedding(vector: List[float], dimensions: Optional[int] = None) -> List[float]:
+    """
+    Reduce an embedding to the configured dimension.
+
+    nomic-embed-text is Matryoshka-trained, so its leading dimensions carry
+    most of the signal. When `dimensions` (default QDRANT_VECTOR_SIZE) is
+    smaller than the model output the vector is truncated and L2
+    renormalized; full-size vectors are returned unchanged.
+    """
+    dimensions = dimensions or settings.QDRANT_VECTOR_SIZE
+    if not vector or len(vector) <= dimensions:
+        return vector
+
+    truncated = vector[:dimensions]
+    norm = math.sqrt(sum(x * x for x in truncated))
+    if norm == 0:
+        return truncated
+    return [x / norm for x in truncated]
+
+
+class OllamaEmbedder:
+    """
+    Embed many texts per request with Ollama's /api/embed.
+
+    Older Ollama servers only have the single-prompt /api/embeddings
+    endpoint; on a 404 the embedder falls back to it for the rest of the run.
+    Vectors go through prepare_embedding.
+    """
+
+    def __init__(self, url: Optional[str] = None, model: Optional[str] = None,
+                 timeout: Optional[int] = None):
+        self.url = url or settings.OLLAMA_HOST
+        self.model = model or settings.OLLAMA_EMBEDDING_MODEL
+        self.timeout = timeout or settings.TIMEOUT
+        self.session = requests.Session()
+        self.batch_endpoint = True
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed `texts`, returning one vector (or None on failure) per text"""
+        if not texts:
+            return []
+        if self.batch_endpoint:
+            response = self.session.post(
+                f"{self.url}/api/embed",
+                json={"model": self.model, "input": texts},
+                # A batch takes roughly as long as its texts did one by one
+                timeout=self.timeout * max(1, len(texts) // 8)
+            )
+            if response.status_code == 404:
+                self.batch_endpoint = False
+            else:
+                response.raise_for_status()
+                return [prepare_embedding(vector) for vector in response.json()['embeddings']]
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> Optional[List[float]]:
+        try:
+            response = self.session.post(
+                f"{self.url}/api/embeddings",
+                json={"model": self.model, "prompt": text},
+                timeout=self.timeout
+            )
+            if response.status_code == 200:
+                return prepare_embedding(response.json()['embedding'])
+        except requests.RequestException as e:
+            print(f"  ✗ Embedding error: {e}")
+        return None
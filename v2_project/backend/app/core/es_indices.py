@@ -0,0 +1,158 @@
+"""
+Versioned Elasticsearch Indices
+Zero-downtime reindexing behind an alias so search never hits a missing index
+"""
+import copy
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from elasticsearch import Elasticsearch
+
+from app.core.config import settings
+
+
+class VersionedIndex:
+    """
+    Manage `{alias}_v{n}` physical indices behind a stable alias.
+
+    Builds are created with refresh disabled and no replicas for fast bulk
+    loading. `finalize` restores the index settings from the mapping body and
+    force-merges; `validate` gates the swap on a doc count and a sample query;
+    `publish` moves the alias atomically and drops old versions.
+    """
+
+    def __init__(self, es: Elasticsearch, alias: str, keep_versions: Optional[int] = None):
+        self.es = es
+        self.alias = alias
+        self.keep_versions = settings.ES_KEEP_VERSIONS if keep_versions is None else keep_versions
+        self._version_re = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+        self._final_settings: Dict[str, Dict] = {}
+
+    def versions(self) -> List[Tuple[int, str]]:
+        """List (version, index_name) pairs, oldest first"""
+        indices = self.es.indices.get(index=f"{self.alias}_v*", allow_no_indices=True)
+        found = []
+        for name in indices:
+            match = self._version_re.match(name)
+            if match:
+                found.append((int(match.group(1)), name))
+        return sorted(found)
+
+    def live_index(self) -> Optional[str]:
+        """Name of the index the alias currently points to"""
+        if not self.es.indices.exists_alias(name=self.alias):
+            return None
+        return next(iter(self.es.indices.get_alias(name=self.alias)), None)
+
+    def exists(self) -> bool:
+        """True if the alias (or a pre-alias index of the same name) is live"""
+        return bool(self.es.indices.exists(index=self.alias))
+
+    def has_mapping(self, body: Dict) -> bool:
+        """True if the live index exists and has every top-level field declared in `body`"""
+        if not self.exists():
+            return False
+        declared = body.get("mappings", {}).get("properties", {})
+        live = next(iter(self.es.indices.get_mapping(index=self.alias).values()))
+        return set(declared) <= set(live["mappings"].get("properties", {}))
+
+    def bump_generation(self, name: str) -> str:
+        """Stamp `name` with a new catalog generation so cached facets are rebuilt"""
+        generation = datetime.utcnow().isoformat()
+        self.es.indices.put_mapping(index=name, meta={"catalog_generation": generation})
+        return generation
+
+    def _is_legacy_index(self) -> bool:
+        """True if a concrete (non-alias) index still uses the alias name"""
+        return self.es.indices.exists(index=self.alias) and not self.es.indices.exists_alias(name=self.alias)
+
+    def create_build(self, body: Dict) -> str:
+        """Create the next versioned index for bulk loading and return its name"""
+        versions = self.versions()
+        next_version = versions[-1][0] + 1 if versions else 1
+        name = f"{self.alias}_v{next_version}"
+
+        body = copy.deepcopy(body)
+        index_settings = body.setdefault("settings", {})
+        self._final_settings[name] = {
+            "refresh_interval": index_settings.get("refresh_interval", "1s"),
+            "number_of_replicas": index_settings.get("number_of_replicas", 0),
+        }
+        index_settings["refresh_interval"] = "-1"
+        index_settings["number_of_replicas"] = 0
+
+        self.es.indices.create(index=name, body=body)
+        print(f"✅ Created build index: {name} (alias '{self.alias}' -> {self.live_index() or 'none'})")
+        return name
+
+    def finalize(self, name: str):
+        """Restore refresh/replica settings, refresh and force-merge a finished build"""
+        final = self._final_settings.get(name, {"refresh_interval": "1s", "number_of_replicas": 0})
+        self.es.indices.put_settings(index=name, settings={"index": final})
+        self.es.indices.refresh(index=name)
+        # Segments never change after the build, so merge them down once
+        self.es.options(request_timeout=600).indices.forcemerge(index=name, max_num_segments=1)
+
+    def validate(self, name: str, expected_docs: int = 0, sample_query: Optional[Dict] = None) -> bool:
+        """
+        Check a build before it goes live.
+
+        The build must not be empty, must hold at least `expected_docs`
+        documents and at least ES_MIN_DOC_RATIO of the live index, and
+        `sample_query` (if given) must return a hit.
+        """
+        count = self.es.count(index=name)['count']
+        if count == 0 or count < expected_docs:
+            print(f"  ✗ Validation failed: {count} docs in '{name}', expected {max(expected_docs, 1)}")
+            return False
+
+        live = self.live_index() or (self.alias if self._is_legacy_index() else None)
+        if live:
+            live_count = self.es.count(index=live)['count']
+            if count < live_count * settings.ES_MIN_DOC_RATIO:
+                print(f"  ✗ Validation failed: {count} docs in '{name}' vs {live_count} live "
+                      f"(minimum ratio {settings.ES_MIN_DOC_RATIO})")
+                return False
+
+        if sample_query:
+            hits = self.es.search(index=name, body={"query": sample_query, "size": 1})['hits']['hits']
+            if not hits:
+                print(f"  ✗ Validation failed: sample query returned nothing from '{name}'")
+                return False
+
+        return True
+
+    def publish(self, name: str):
+        """Atomically point the alias at `name`, then garbage-collect old versions"""
+        actions = []
+        live = self.live_index()
+        if live:
+            actions.append({"remove": {"index": live, "alias": self.alias}})
+        elif self._is_legacy_index():
+            # The pre-alias index is dropped in the same atomic request
+            print(f"⚠️  Replacing legacy index '{self.alias}' with an alias")
+            actions.append({"remove_index": {"index": self.alias}})
+        actions.append({"add": {"index": name, "alias": self.alias}})
+
+        self.es.indices.update_aliases(actions=actions)
+        print(f"✅ Alias '{self.alias}' -> {name}")
+
+        self.garbage_collect()
+
+    def discard(self, name: str):
+        """Drop a build that failed validation; the live alias is untouched"""
+        self.es.indices.delete(index=name)
+        print(f"🗑️  Discarded build index: {name}")
+
+    def garbage_collect(self):
+        """Delete versions older than the live one beyond keep_versions"""
+        live = self.live_index()
+        versions = self.versions()
+        live_version = next((v for v, name in versions if name == live), None)
+        if live_version is None:
+            return
+
+        older = [name for v, name in versions if v < live_version]
+        for name in older[:max(len(older) - self.keep_versions, 0)]:
+            self.es.indices.delete(index=name)
+            print(f"🗑️  Removed old index version: {name}")
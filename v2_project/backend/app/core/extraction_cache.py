@@ -0,0 +1,55 @@
+"""
+Extracted Datasheet Cache
+pdfplumber output (page text and tables) persisted per PDF content hash as gzip JSON
+"""
+import gzip
+import json
+import os
+from typing import Dict, List, Optional
+
+# Bump when extract_pdf_pages output changes, so cached extractions are redone
+EXTRACTOR_VERSION = 1
+
+
+def read_cached_pages(path: str) -> Optional[List[Dict]]:
+    """Pages from a cache file, or None if it is missing, unreadable or stale"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("extractor") != EXTRACTOR_VERSION:
+        return None
+    return data.get("pages")
+
+
+def write_cached_pages(path: str, pages: List[Dict]):
+    """Write pages atomically (safe to call from extraction worker processes)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump({"extractor": EXTRACTOR_VERSION, "pages": pages}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class ExtractionCache:
+    """
+    `{pdf_dir}/extracted/{hash[:2]}/{hash}.json.gz` holds the pages of one
+    stored PDF. Extraction depends only on the PDF bytes, so chunking and
+    embedding settings can change without re-parsing any PDF.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.join(root, "extracted")
+        self.stats = {"hits": 0, "misses": 0}
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}.json.gz")
+
+    def get(self, sha256: str) -> Optional[List[Dict]]:
+        pages = read_cached_pages(self.path(sha256))
+        self.stats["hits" if pages is not None else "misses"] += 1
+        return pages
+
+    def put(self, sha256: str, pages: List[Dict]):
+        write_cached_pages(self.path(sha256), pages)
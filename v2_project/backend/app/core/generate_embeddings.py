@@ -6,13 +6,31 @@ import sys
 import json
 import time
 import uuid
-from typing import List, Dict, Optional
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Optional
 from elasticsearch import Elasticsearch
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import PointStruct
 import requests
 
 from app.core.config import settings, get_es_url, get_qdrant_url
+from app.core.qdrant_collections import VersionedCollection
+from app.core.embeddings import prepare_embedding
+from app.core.es_pagination import iter_documents
+
+# Only the fields read by create_product_text and the Qdrant payload are
+# fetched; specifications blobs are large and only a few keys are used.
+PRODUCT_SOURCE_FIELDS = [
+    "part_number",
+    "name",
+    "description",
+    "category",
+    "url",
+    "image_urls",
+    "pdf_url",
+    "specifications",
+]
 
 
 class EmbeddingGenerator:
@@ -21,7 +39,10 @@ class EmbeddingGenerator:
     def __init__(self):
         self.es = Elasticsearch([get_es_url()])
         self.qdrant = QdrantClient(url=get_qdrant_url())
-        self.collection_name = settings.QDRANT_PRODUCTS_COLLECTION
+        # Readers query the alias; builds write into a versioned collection
+        self.alias = settings.QDRANT_PRODUCTS_COLLECTION
+        self.collections = VersionedCollection(self.qdrant, self.alias)
+        self.collection_name = self.alias
         self.ollama_url = settings.OLLAMA_HOST
         self.embedding_model = settings.OLLAMA_EMBEDDING_MODEL
         
@@ -50,23 +71,22 @@ class EmbeddingGenerator:
             return False
     
     def create_collection(self):
-        """Create Qdrant collection for product vectors"""
-        # Delete if exists
-        try:
-            self.qdrant.delete_collection(collection_name=self.collection_name)
-            print(f"⚠️  Collection '{self.collection_name}' deleted.")
-        except:
-            pass
+        """Create a new versioned Qdrant collection to build product vectors into"""
+        self.collection_name = self.collections.create_build()
+    
+    def publish_collection(self, expected_points: int, errors: int = 0) -> bool:
+        """
+        Validate the build and swap the alias to it; discard it otherwise.
         
-        # Create collection
-        self.qdrant.create_collection(
-            collection_name=self.collection_name,
-            vectors_config=VectorParams(
-                size=settings.QDRANT_VECTOR_SIZE,
-                distance=Distance.COSINE
-            )
-        )
-        print(f"✅ Created collection: {self.collection_name}")
+        Rejected when nothing was embedded, too many embeddings failed, or
+        the build is much smaller than the live collection.
+        """
+        if expected_points <= 0 or not self.collections.validate(self.collection_name, expected_points, errors):
+            self.collections.discard(self.collection_name)
+            return False
+        
+        self.collections.publish(self.collection_name)
+        return True
     
     def generate_embedding(self, text: str) -> Optional[List[float]]:
         """Generate embedding for text using Ollama"""
@@ -81,7 +101,7 @@ class EmbeddingGenerator:
             )
             
             if response.status_code == 200:
-                return response.json()['embedding']
+                return prepare_embedding(response.json()['embedding'])
             else:
                 print(f"  ✗ Embedding error: {response.status_code}")
                 return None
@@ -121,76 +141,87 @@ class EmbeddingGenerator:
         
         return " | ".join(parts)
     
-    def get_products_from_es(self) -> List[Dict]:
-        """Fetch all products from Elasticsearch"""
-        products = []
+    def get_products_from_es(self, slice_id: Optional[int] = None,
+                             max_slices: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream products from Elasticsearch one at a time.
         
-        # Use scroll API for large datasets
-        result = self.es.search(
-            index=settings.ES_PRODUCTS_INDEX,
-            body={
-                "query": {"match_all": {}},
-                "size": 100
-            },
-            scroll='2m'
-        )
+        Pages through a point-in-time with search_after, limited to
+        PRODUCT_SOURCE_FIELDS, so memory stays flat regardless of catalog size.
+        Pass slice_id/max_slices to consume a disjoint slice of the index from
+        a parallel worker. The point-in-time is closed when the generator
+        finishes or is closed.
+        """
+        for hit in iter_documents(
+            self.es,
+            settings.ES_PRODUCTS_INDEX,
+            source=PRODUCT_SOURCE_FIELDS,
+            page_size=settings.BATCH_SIZE,
+            slice_id=slice_id,
+            max_slices=max_slices
+        ):
+            yield {
+                "id": hit['_id'],
+                **hit['_source']
+            }
+    
+    def count_products(self) -> int:
+        """Count products in Elasticsearch (used for progress reporting)"""
+        return self.es.count(index=settings.ES_PRODUCTS_INDEX)['count']
+    
+    def _batches(self, products: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+        """Group a product stream into lists of batch_size"""
+        batch = []
+        for product in products:
+            batch.append(product)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def build_point(self, product: Dict) -> Optional[PointStruct]:
+        """Embed a product and build its Qdrant point (None on failure)"""
+        # Create embedding text
+        text = self.create_product_text(product)
         
-        scroll_id = result['_scroll_id']
-        hits = result['hits']['hits']
+        # Generate embedding
+        vector = self.generate_embedding(text)
+        if not vector:
+            return None
         
-        while hits:
-            for hit in hits:
-                products.append({
-                    "id": hit['_id'],
-                    **hit['_source']
-                })
-            
-            # Get next batch
-            result = self.es.scroll(scroll_id=scroll_id, scroll='2m')
-            scroll_id = result['_scroll_id']
-            hits = result['hits']['hits']
+        # Generate a consistent UUID from the part_number
+        # Qdrant requires IDs to be UUIDs or unsigned 64-bit integers
+        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"alsakr.product.{product['part_number']}"))
         
-        return products
+        return PointStruct(
+            id=point_id,
+            vector=vector,
+            payload={
+                "part_number": product.get('part_number'),
+                "name": product.get('name'),
+                "description": product.get('description'),
+                "category": product.get('category'),
+                "url": product.get('url'),
+                "image_url": product.get('image_urls', [])[0] if product.get('image_urls') else None,
+                "pdf_url": product.get('pdf_url')
+            }
+        )
     
-    def batch_process_embeddings(self, products: List[Dict]):
-        """Process products in batches and store vectors"""
-        total = len(products)
+    def batch_process_embeddings(self, products: Iterable[Dict], total: Optional[int] = None):
+        """Process a product stream in batches and store vectors"""
         batch_size = settings.BATCH_SIZE
         processed = 0
         errors = 0
         
-        print(f"\n📊 Processing {total} products in batches of {batch_size}...")
+        print(f"\n📊 Processing {total if total is not None else 'all'} products in batches of {batch_size}...")
         
-        for i in range(0, total, batch_size):
-            batch = products[i:i+batch_size]
+        for batch in self._batches(products, batch_size):
             points = []
             
             for product in batch:
-                # Create embedding text
-                text = self.create_product_text(product)
-                
-                # Generate embedding
-                vector = self.generate_embedding(text)
-                
-                if vector:
-                    # Generate a consistent UUID from the part_number
-                    # Qdrant requires IDs to be UUIDs or unsigned 64-bit integers
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"alsakr.product.{product['part_number']}"))
-                    
-                    # Create point
-                    point = PointStruct(
-                        id=point_id,
-                        vector=vector,
-                        payload={
-                            "part_number": product.get('part_number'),
-                            "name": product.get('name'),
-                            "description": product.get('description'),
-                            "category": product.get('category'),
-                            "url": product.get('url'),
-                            "image_url": product.get('image_urls', [])[0] if product.get('image_urls') else None,
-                            "pdf_url": product.get('pdf_url')
-                        }
-                    )
+                point = self.build_point(product)
+                if point:
                     points.append(point)
                     processed += 1
                 else:
@@ -198,7 +229,7 @@ class EmbeddingGenerator:
                 
                 # Progress indicator
                 if (processed + errors) % 10 == 0:
-                    print(f"  ✓ {processed + errors}/{total} processed...")
+                    print(f"  ✓ {processed + errors}/{total if total is not None else '?'} processed...")
             
             # Upload batch to Qdrant
             if points:
@@ -212,17 +243,47 @@ class EmbeddingGenerator:
                     # If it's a 400 error, print more info
                     if hasattr(e, 'response') and e.response is not None:
                         print(f"  Response: {e.response.text}")
+                    processed -= len(points)
                     errors += len(points)
             
             # Small delay to avoid overwhelming Ollama
             time.sleep(0.5)
         
         return {
-            "total": total,
+            "total": processed + errors,
             "processed": processed,
             "errors": errors
         }
     
+    def process_all_products(self, workers: int = 1) -> Dict:
+        """
+        Embed the whole catalog, optionally with several sliced workers.
+        
+        Each worker consumes its own slice of the index, so no product list is
+        ever materialised and the slices never overlap.
+        """
+        total = self.count_products()
+        if workers <= 1:
+            return self.batch_process_embeddings(self.get_products_from_es(), total=total)
+        
+        print(f"🔀 Using {workers} sliced workers")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    self.batch_process_embeddings,
+                    self.get_products_from_es(slice_id=i, max_slices=workers),
+                    None
+                )
+                for i in range(workers)
+            ]
+            results = [f.result() for f in futures]
+        
+        return {
+            "total": sum(r['total'] for r in results),
+            "processed": sum(r['processed'] for r in results),
+            "errors": sum(r['errors'] for r in results)
+        }
+    
     def verify_collection(self):
         """Verify collection and show sample"""
         info = self.qdrant.get_collection(collection_name=self.collection_name)
@@ -251,6 +312,11 @@ class EmbeddingGenerator:
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Generate product embeddings in Qdrant")
+    parser.add_argument("--workers", type=int, default=settings.EMBEDDING_WORKERS,
+                        help="Number of parallel sliced workers")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("🧠 SICK Product Embedding Generation for Qdrant")
     print("=" * 70)
@@ -267,27 +333,29 @@ def main():
     print(f"✅ Ollama ready with model '{generator.embedding_model}'")
     
     # Step 1: Create collection
-    print("\n[Step 1/4] Creating Qdrant collection...")
+    print("\n[Step 1/4] Creating Qdrant build collection...")
     generator.create_collection()
     
-    # Step 2: Get products
-    print("\n[Step 2/4] Fetching products from Elasticsearch...")
-    products = generator.get_products_from_es()
-    print(f"✅ Retrieved {len(products)} products")
+    # Step 2: Count products (they are streamed from Elasticsearch in step 3)
+    print("\n[Step 2/4] Counting products in Elasticsearch...")
+    print(f"✅ Found {generator.count_products()} products")
     
     # Step 3: Generate embeddings
     print("\n[Step 3/4] Generating embeddings...")
     print("⏳ This may take 10-30 minutes depending on product count...")
-    result = generator.batch_process_embeddings(products)
+    result = generator.process_all_products(workers=args.workers)
     
     print(f"\n✅ Embedding generation completed!")
     print(f"  - Total: {result['total']} products")
     print(f"  - Processed: {result['processed']} vectors")
     print(f"  - Errors: {result['errors']}")
     
-    # Step 4: Verify
-    print("\n[Step 4/4] Verifying collection...")
+    # Step 4: Verify and publish
+    print("\n[Step 4/4] Verifying and publishing collection...")
     generator.verify_collection()
+    if not generator.publish_collection(expected_points=result['processed'], errors=result['errors']):
+        print(f"\n❌ Build rejected. Alias '{generator.alias}' still serves the previous version.")
+        return 1
     
     print("\n" + "=" * 70)
     print("✨ Embeddings ready! Semantic search enabled.")
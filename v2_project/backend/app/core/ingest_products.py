@@ -3,247 +3,150 @@ Elasticsearch Product Ingestion Script
 Import SICK products from CSV to Elasticsearch with proper mapping
 """
 import csv
-import json
+import os
 import sys
-from typing import Dict, List, Optional
-from elasticsearch import Elasticsearch, helpers
-from datetime import datetime
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional
 
-from app.core.config import settings, get_es_url, get_products_csv_path
+from app.core.bulk_indexer import BulkOp, chunk_ops, serialize_action
+from app.core.catalog_snapshot import iter_snapshot_records
+from app.core.parallel_csv import read_csv_range, read_header, split_csv_ranges
+from app.core.product_delta import DeltaPlanner
+from app.core.product_ingest_common import BaseProductIngester, run_ingest
+from app.core.config import settings, get_products_csv_path
 
 
-class ProductIngester:
-    """Handle product data ingestion into Elasticsearch"""
+class ProductIngester(BaseProductIngester):
+    """Handle product data ingestion from CSV into Elasticsearch"""
     
     def __init__(self):
-        self.es = Elasticsearch([get_es_url()], request_timeout=30)
-        self.index_name = settings.ES_PRODUCTS_INDEX
+        super().__init__()
         self.csv_path = get_products_csv_path()
+        self.workers = settings.INGEST_WORKERS or os.cpu_count() or 1
         
-    def create_index(self):
-        """Create Elasticsearch index with proper mapping"""
-        mapping = {
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 0,
-                "index.mapping.total_fields.limit": 5000,
-                "analysis": {
-                    "analyzer": {
-                        "product_analyzer": {
-                            "type": "custom",
-                            "tokenizer": "standard",
-                            "filter": ["lowercase", "asciifolding"]
-                        }
-                    }
-                }
-            },
-            "mappings": {
-                "properties": {
-                    "part_number": {"type": "keyword"},
-                    "url": {"type": "keyword"},
-                    "name": {
-                        "type": "text",
-                        "analyzer": "product_analyzer",
-                        "fields": {
-                            "keyword": {"type": "keyword"}
-                        }
-                    },
-                    "description": {
-                        "type": "text",
-                        "analyzer": "product_analyzer"
-                    },
-                    "category": {
-                        "type": "text",
-                        "fields": {
-                            "keyword": {"type": "keyword"}
-                        }
-                    },
-                    "actual_part_no": {"type": "keyword"},
-                    "price_teaser": {"type": "text"},
-                    "phased_out": {"type": "boolean"},
-                    "successor_product": {"type": "text"},
-                    "certificates": {"type": "keyword"},
-                    "specifications": {"type": "flattened"},
-                    "suitable_accessories": {"type": "text"},
-                    "image_urls": {"type": "keyword"},
-                    "local_image_paths": {"type": "keyword"},
-                    "pdf_url": {"type": "keyword"},
-                    "indexed_at": {"type": "date"}
-                }
-            }
-        }
+    def iter_rows(self) -> Iterator[Dict]:
+        """Yield product rows from the CSV file or a .parquet catalog snapshot"""
+        if self.csv_path.endswith('.parquet'):
+            yield from iter_snapshot_records(self.csv_path)
+            return
         
-        # Delete if exists
-        if self.es.indices.exists(index=self.index_name):
-            print(f"⚠️  Index '{self.index_name}' already exists. Deleting...")
-            self.es.indices.delete(index=self.index_name)
-        
-        # Create index
-        self.es.indices.create(index=self.index_name, body=mapping)
-        print(f"✅ Created index: {self.index_name}")
-    
-    def parse_json_field(self, value: str) -> Optional[Dict]:
-        """Parse JSON string fields safely"""
-        if not value or value == "N/A":
-            return None
-        try:
-            # Handle escaped quotes
-            return json.loads(value)
-        except json.JSONDecodeError:
-            return None
-    
-    def parse_boolean(self, value: str) -> bool:
-        """Convert string to boolean"""
-        return value.lower() in ['yes', 'true', '1']
+        with open(self.csv_path, 'r', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
     
-    def parse_list(self, value: str, delimiter: str = '|') -> List[str]:
-        """Parse delimited string to list"""
-        if not value or value == "N/A":
-            return []
-        return [item.strip() for item in value.split(delimiter) if item.strip()]
+    def generate_chunks_parallel(self, stats: Dict) -> Iterator[List[BulkOp]]:
+        """
+        Parse and serialize CSV byte ranges in a process pool, yielding
+        ready-to-send bulk chunks as workers finish them.
+        """
+        fieldnames, _ = read_header(self.csv_path)
+        ranges = split_csv_ranges(self.csv_path, settings.INGEST_RANGE_BYTES)
+        existing = self.delta.existing if self.delta else None
+        print(f"⚙️  Parsing {len(ranges)} CSV ranges with {self.workers} processes")
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_parse_worker,
+                                 initargs=(self.index_name, existing)) as pool:
+            tasks = ((self.csv_path, fieldnames, byte_range) for byte_range in ranges)
+            in_flight = set()
+            for task in tasks:
+                # Bound parsed-but-unsent ranges held in memory
+                if len(in_flight) >= self.workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._collect_range(future.result(), stats)
+                in_flight.add(pool.submit(_parse_range, task))
+            for future in in_flight:
+                yield from self._collect_range(future.result(), stats)
+        
+        if self.delta:
+            deletes = self.delta.delete_actions(self.index_name, stats['errors'])
+            yield from chunk_ops(serialize_action(action) for action in deletes)
     
-    def process_product(self, row: Dict) -> Dict:
-        """Transform CSV row to Elasticsearch document"""
-        return {
-            "part_number": row.get("part_number", "").strip(),
-            "url": row.get("url", "").strip(),
-            "name": row.get("name", "").strip(),
-            "description": row.get("description", "").strip(),
-            "category": row.get("category", "").strip(),
-            "actual_part_no": row.get("actual_part_no", "").strip(),
-            "price_teaser": row.get("price_teaser", "").strip(),
-            "phased_out": self.parse_boolean(row.get("phased_out", "No")),
-            "successor_product": row.get("successor_product", "").strip(),
-            "certificates": self.parse_list(row.get("certificates", "")),
-            "specifications": self.parse_json_field(row.get("specifications", "")),
-            "suitable_accessories": row.get("suitable_accessories", "").strip(),
-            "image_urls": self.parse_list(row.get("image_urls", "")),
-            "local_image_paths": self.parse_list(row.get("local_image_paths", "")),
-            "pdf_url": row.get("pdf_url", "").strip(),
-            "indexed_at": datetime.utcnow().isoformat()
-        }
+    def _collect_range(self, result: Dict, stats: Dict) -> Iterator[List[BulkOp]]:
+        """Merge one worker result into the run's stats and yield its chunks"""
+        stats['processed'] += result['stats']['processed']
+        stats['errors'] += result['stats']['errors']
+        if self.sample_part_number is None:
+            self.sample_part_number = result['sample_part_number']
+        if self.delta:
+            self.delta.merge(result['seen'], result['delta_stats'])
+        yield from result['chunks']
     
     def bulk_index_products(self) -> Dict:
         """Read CSV and bulk index all products"""
         print(f"📖 Reading products from: {self.csv_path}")
         
-        actions = []
-        processed = 0
-        errors = 0
+        stats = {"processed": 0, "errors": 0}
         
         try:
-            with open(self.csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                
-                for row in reader:
-                    try:
-                        doc = self.process_product(row)
-                        
-                        # Skip if no part number
-                        if not doc['part_number']:
-                            continue
-                        
-                        action = {
-                            "_index": self.index_name,
-                            "_id": doc['part_number'],
-                            "_source": doc
-                        }
-                        actions.append(action)
-                        processed += 1
-                        
-                        # Bulk index in batches
-                        if len(actions) >= 100:
-                            success, failed = helpers.bulk(self.es, actions, raise_on_error=False)
-                            if failed:
-                                for item in failed:
-                                    print(f"  ✗ Index error for {item['index']['_id']}: {item['index']['error']['reason']}")
-                            errors += len(failed)
-                            actions = []
-                            print(f"  ✓ Indexed {processed} products...")
-                            
-                    except Exception as e:
-                        print(f"  ✗ Error processing row: {e}")
-                        errors += 1
-                
-                # Index remaining
-                if actions:
-                    success, failed = helpers.bulk(self.es, actions, raise_on_error=False)
-                    if failed:
-                        for item in failed:
-                            print(f"  ✗ Index error for {item['index']['_id']}: {item['index']['error']['reason']}")
-                    errors += len(failed)
-        
+            if self.workers > 1 and not self.csv_path.endswith('.parquet'):
+                report = self.bulk.index_chunks(self.generate_chunks_parallel(stats))
+            else:
+                actions = self.generate_actions(stats)
+                if self.delta:
+                    actions = self.delta.plan(actions, self.index_name, stats)
+                report = self.bulk.index(actions)
         except FileNotFoundError:
             print(f"❌ CSV file not found: {self.csv_path}")
             return {"success": False, "error": "CSV file not found"}
         
-        # Refresh index
-        self.es.indices.refresh(index=self.index_name)
-        
-        # Get count
-        count = self.es.count(index=self.index_name)['count']
-        
-        return {
-            "success": True,
-            "processed": processed,
-            "indexed": count,
-            "errors": errors
-        }
+        return self.finish_bulk(report, stats)
+
+
+# Per-process state for parallel CSV parsing, set by _init_parse_worker
+_worker_ingester: Optional[ProductIngester] = None
+_worker_existing: Optional[Dict[str, str]] = None
+
+
+def _init_parse_worker(index_name: str, existing: Optional[Dict[str, str]]):
+    global _worker_ingester, _worker_existing
+    _worker_ingester = ProductIngester()
+    _worker_ingester.index_name = index_name
+    _worker_existing = existing
+
+
+def _parse_range(task) -> Dict:
+    """Turn one CSV byte range into serialized bulk chunks (runs in a worker process)"""
+    path, fieldnames, byte_range = task
+    ingester = _worker_ingester
+    ingester.sample_part_number = None
+    stats = {"processed": 0, "errors": 0}
     
-    def verify_index(self):
-        """Verify index and show sample"""
-        count = self.es.count(index=self.index_name)['count']
-        print(f"\n📊 Total products indexed: {count}")
-        
-        # Get sample
-        result = self.es.search(
-            index=self.index_name,
-            body={"query": {"match_all": {}}, "size": 1}
-        )
-        
-        if result['hits']['hits']:
-            sample = result['hits']['hits'][0]['_source']
-            print(f"\n📦 Sample product:")
-            print(f"  Part Number: {sample.get('part_number')}")
-            print(f"  Name: {sample.get('name')}")
-            print(f"  Category: {sample.get('category')}")
-            print(f"  URL: {sample.get('url')[:60]}...")
+    actions = ingester.generate_actions(stats, read_csv_range(path, fieldnames, byte_range))
+    planner = DeltaPlanner(_worker_existing) if _worker_existing is not None else None
+    if planner:
+        actions = planner.filter_changed(actions)
+    chunks = list(chunk_ops(serialize_action(action) for action in actions))
+    
+    return {
+        "chunks": chunks,
+        "stats": stats,
+        "sample_part_number": ingester.sample_part_number,
+        "seen": planner.seen if planner else (),
+        "delta_stats": planner.stats if planner else {},
+    }
 
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Ingest SICK products from CSV into Elasticsearch")
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild a new index version instead of a delta update of the live index")
+    parser.add_argument("--input", help="Input file (CSV or a .parquet catalog snapshot)")
+    parser.add_argument("--workers", type=int,
+                        help="CSV parse processes (default: INGEST_WORKERS, 0 = one per core)")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("🚀 SICK Product Ingestion to Elasticsearch")
     print("=" * 70)
     
     ingester = ProductIngester()
-    
-    # Step 1: Create index
-    print("\n[Step 1/3] Creating Elasticsearch index...")
-    ingester.create_index()
-    
-    # Step 2: Bulk index
-    print("\n[Step 2/3] Importing products from CSV...")
-    result = ingester.bulk_index_products()
-    
-    if result['success']:
-        print(f"\n✅ Import completed!")
-        print(f"  - Processed: {result['processed']} rows")
-        print(f"  - Indexed: {result['indexed']} products")
-        print(f"  - Errors: {result['errors']}")
-    else:
-        print(f"\n❌ Import failed: {result.get('error')}")
-        return 1
-    
-    # Step 3: Verify
-    print("\n[Step 3/3] Verifying index...")
-    ingester.verify_index()
-    
-    print("\n" + "=" * 70)
-    print("✨ Ingestion complete! Products ready for search.")
-    print("=" * 70)
-    
-    return 0
+    if args.input:
+        ingester.csv_path = args.input
+    if args.workers is not None:
+        ingester.workers = args.workers or os.cpu_count() or 1
+    return run_ingest(ingester, args.full, "CSV")
 
 
 if __name__ == "__main__":
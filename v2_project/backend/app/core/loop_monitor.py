@@ -0,0 +1,138 @@
+"""
+Event Loop Monitor
+Opt-in measurement of asyncio event-loop lag with stack capture of blocking code
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Detect code that blocks the event loop.
+
+    A heartbeat task sleeps `interval` seconds and records how late it wakes
+    up (the loop lag). A watchdog thread checks the heartbeat; when the loop
+    has not come back for `threshold` seconds it captures the loop thread's
+    current stack, which points at the blocking call while it is still
+    running. With `asyncio_debug`, asyncio also logs every callback slower
+    than the threshold (costly; for diagnosis only).
+    """
+
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None,
+                 asyncio_debug: Optional[bool] = None, history: int = 1000, max_stalls: int = 20):
+        self.interval = interval or settings.LOOP_MONITOR_INTERVAL
+        self.threshold = threshold or settings.LOOP_MONITOR_THRESHOLD
+        self.asyncio_debug = settings.LOOP_MONITOR_ASYNCIO_DEBUG if asyncio_debug is None else asyncio_debug
+        self.lags = deque(maxlen=history)
+        self.stalls = deque(maxlen=max_stalls)
+        self.beats = 0
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self.started_at: Optional[float] = None
+        self._last_beat = 0.0
+        self._stall_reported = False
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self):
+        """Start monitoring the running loop (call from inside it)"""
+        loop = asyncio.get_running_loop()
+        if self._task is not None:
+            return
+        if self.asyncio_debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+        self._loop_thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (interval {self.interval}s, threshold {self.threshold}s)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            self._stall_reported = False
+            self.beats += 1
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold and self.stalls and self.stalls[-1]["duration"] is None:
+                # Close out the stall the watchdog opened
+                self.stalls[-1]["duration"] = round(lag, 3)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 4):
+            blocked = time.monotonic() - self._last_beat - self.interval
+            if blocked < self.threshold or self._stall_reported:
+                continue
+            self._stall_reported = True
+            self.stall_count += 1
+            stack = self._loop_stack()
+            self.stalls.append({
+                "at": time.time(),
+                "blocked_for": round(blocked, 3),
+                "duration": None,  # Filled in when the loop wakes up
+                "stack": stack,
+            })
+            logger.warning(f"Event loop blocked for {blocked:.3f}s:\n{''.join(stack)}")
+
+    def _loop_stack(self) -> List[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return traceback.format_stack(frame) if frame is not None else []
+
+    def snapshot(self) -> Dict:
+        """Lag statistics (seconds) and the most recent stalls with their stacks"""
+        lags = sorted(self.lags)
+
+        def percentile(p: float) -> float:
+            return round(lags[min(len(lags) - 1, int(p * len(lags)))], 4) if lags else 0.0
+
+        return {
+            "running": self._task is not None,
+            "started_at": self.started_at,
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "beats": self.beats,
+            "stall_count": self.stall_count,
+            "lag": {
+                "mean": round(statistics.fmean(lags), 4) if lags else 0.0,
+                "p50": percentile(0.5),
+                "p99": percentile(0.99),
+                "last": round(self.lags[-1], 4) if self.lags else 0.0,
+                "max": round(self.max_lag, 4),
+            },
+            "stalls": list(self.stalls),
+        }
+
+
+# Global instance, started by the API when LOOP_MONITOR_ENABLED is set
+loop_monitor = LoopMonitor()
@@ -0,0 +1,117 @@
+"""
+Multi-Search Coalescing
+Group concurrent Elasticsearch searches into one _msearch request (Async)
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+from elasticsearch import AsyncElasticsearch
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MSearchItemError(Exception):
+    """A single search inside an _msearch request failed"""
+
+    def __init__(self, status: int, error):
+        self.status = status
+        self.error = error
+        super().__init__(f"msearch item failed ({status}): {error}")
+
+
+class MSearchCoalescer:
+    """
+    Collect searches issued within a short window and send them as one
+    _msearch, resolving each caller's future with its own response.
+
+    When no batch is in flight, queued searches go out on the next loop
+    iteration, so a lone search adds no delay and searches started together
+    (e.g. with asyncio.gather) share a request. While a batch is in flight,
+    new searches wait up to the window (ES_MSEARCH_WINDOW_MS) to collect
+    more. A batch also goes out once it reaches ES_MSEARCH_MAX_BATCH
+    searches. A lone search is sent as a plain search request. A window of
+    0 disables coalescing.
+    """
+
+    def __init__(self, es: AsyncElasticsearch, window_ms: Optional[float] = None,
+                 max_batch: Optional[int] = None):
+        self.es = es
+        self.window = (settings.ES_MSEARCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or settings.ES_MSEARCH_MAX_BATCH
+        self._pending: List[Tuple[str, Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def search(self, index: str, body: Dict) -> Dict:
+        """Queue a search and wait for its response"""
+        if self.window <= 0:
+            return await self.es.search(index=index, body=body)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((index, body, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            # Only hold searches back when there is load to batch them with
+            if self._tasks:
+                self._timer = loop.call_later(self.window, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Hold a reference so the send task isn't garbage-collected mid-flight
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, Dict, asyncio.Future]]):
+        if len(batch) == 1:
+            index, body, future = batch[0]
+            try:
+                result = await self.es.search(index=index, body=body)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        searches = []
+        for index, body, _ in batch:
+            searches.append({"index": index})
+            searches.append(body)
+
+        try:
+            response = await self.es.msearch(searches=searches)
+        except Exception as e:
+            logger.error(f"Elasticsearch msearch error ({len(batch)} searches): {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), item in zip(batch, response['responses']):
+            if future.done():
+                # Caller was cancelled while the batch was in flight
+                continue
+            if 'error' in item:
+                future.set_exception(MSearchItemError(item.get('status', 500), item['error']))
+            else:
+                future.set_result(item)
+
+    async def close(self):
+        """Send anything still queued and wait for in-flight batches"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
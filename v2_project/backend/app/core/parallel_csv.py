@@ -0,0 +1,56 @@
+"""
+Parallel CSV Reading
+Split a CSV file into byte ranges on record boundaries so separate processes
+can parse it independently
+"""
+import csv
+import io
+import os
+from typing import Dict, Iterator, List, Tuple
+
+# (start, end) byte offsets of a run of complete CSV records
+ByteRange = Tuple[int, int]
+
+
+def read_header(path: str) -> Tuple[List[str], int]:
+    """Return the header fields and the byte offset of the first record"""
+    with open(path, 'rb') as f:
+        line = f.readline()
+        return next(csv.reader([line.decode('utf-8-sig')])), f.tell()
+
+
+def split_csv_ranges(path: str, target_bytes: int) -> List[ByteRange]:
+    """
+    Cut the records of a CSV file into ranges of roughly `target_bytes`.
+
+    Quoted fields may contain newlines, so a cut is only made after a line
+    that leaves an even number of quotes behind it (i.e. outside a field).
+    """
+    _, data_start = read_header(path)
+    size = os.path.getsize(path)
+
+    ranges = []
+    start = data_start
+    in_quotes = False
+    with open(path, 'rb') as f:
+        f.seek(data_start)
+        for line in iter(f.readline, b''):
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            position = f.tell()
+            if not in_quotes and position - start >= target_bytes:
+                ranges.append((start, position))
+                start = position
+
+    if start < size:
+        ranges.append((start, size))
+    return ranges
+
+
+def read_csv_range(path: str, fieldnames: List[str], byte_range: ByteRange) -> Iterator[Dict]:
+    """Parse the records in one byte range as dicts keyed by `fieldnames`"""
+    start, end = byte_range
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    yield from csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames)
@@ -0,0 +1,243 @@
+"""
+Async PDF Downloader
+Concurrent, resumable datasheet downloads into the PDFStore over a shared
+keep-alive client, handed to the (synchronous) extraction pipeline through a queue
+"""
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+import httpx
+
+from app.core.config import settings
+from app.core.pdf_store import PDFStore
+
+# HTTP statuses worth retrying (rate limiting and transient server errors)
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+_DONE = object()
+
+
+class DownloadError(Exception):
+    """A download failed after all retries"""
+
+
+class AsyncPDFDownloader:
+    """
+    Download datasheets for a stream of products with bounded concurrency.
+
+    One httpx.AsyncClient (connection pooling + keep-alive) serves up to
+    PDF_DOWNLOAD_CONCURRENCY downloads, at most PDF_DOWNLOAD_PER_HOST per
+    host. Failures are retried PDF_DOWNLOAD_RETRIES times with jittered
+    exponential backoff, resuming from the partial file with a Range
+    request when the server supports it. Partial files survive failed and
+    interrupted runs, next to the validator of the response they came from,
+    so a later run resumes them too. Completed downloads go through the
+    PDFStore (conditional GETs, content addressing, manifest).
+    """
+
+    def __init__(self, store: PDFStore, concurrency: Optional[int] = None,
+                 per_host: Optional[int] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None):
+        self.store = store
+        self.concurrency = concurrency or settings.PDF_DOWNLOAD_CONCURRENCY
+        self.per_host = per_host or settings.PDF_DOWNLOAD_PER_HOST
+        self.retries = settings.PDF_DOWNLOAD_RETRIES if retries is None else retries
+        self.backoff = backoff or settings.PDF_DOWNLOAD_BACKOFF
+        self.partial_dir = os.path.join(store.root, "partial")
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._downloads: Dict[str, asyncio.Future] = {}
+        self._manifest_lock: Optional[asyncio.Lock] = None
+
+    def downloads(self, products: Iterable[Dict]) -> Iterator[Tuple[Dict, Optional[str]]]:
+        """
+        Yield (product, sha256) as downloads finish (sha256 is None on failure).
+
+        The event loop runs in a background thread; a bounded queue hands
+        results over, so downloads pause while the consumer is busy.
+        """
+        results: queue.Queue = queue.Queue(maxsize=self.concurrency * 2)
+        thread = threading.Thread(
+            target=lambda: asyncio.run(self._run(iter(products), results)),
+            name="pdf-downloader",
+            daemon=True
+        )
+        thread.start()
+
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        thread.join()
+
+    async def _run(self, products: Iterator[Dict], results: queue.Queue):
+        try:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            async with httpx.AsyncClient(limits=limits, timeout=settings.TIMEOUT, follow_redirects=True) as client:
+                todo: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+                workers = [
+                    asyncio.create_task(self._worker(client, todo, results))
+                    for _ in range(self.concurrency)
+                ]
+
+                # The product iterator pages through Elasticsearch; keep it off the loop
+                while True:
+                    product = await asyncio.to_thread(next, products, None)
+                    if product is None:
+                        break
+                    await todo.put(product)
+
+                for _ in workers:
+                    await todo.put(None)
+                await asyncio.gather(*workers)
+            await self._save_manifest()
+            await asyncio.to_thread(results.put, _DONE)
+        except BaseException as e:
+            await asyncio.to_thread(results.put, e)
+            raise
+
+    async def _worker(self, client: httpx.AsyncClient, todo: asyncio.Queue, results: queue.Queue):
+        done = 0
+        while True:
+            product = await todo.get()
+            if product is None:
+                return
+            sha256 = await self.fetch(client, product.get('part_number'), product.get('pdf_url'))
+            # Blocks while the consumer's queue is full (back-pressure)
+            await asyncio.to_thread(results.put, (product, sha256))
+            done += 1
+            if done % 100 == 0:
+                await self._save_manifest()
+
+    async def _save_manifest(self):
+        """Write a snapshot of the manifest without blocking the loop"""
+        if self._manifest_lock is None:
+            self._manifest_lock = asyncio.Lock()
+        async with self._manifest_lock:
+            # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+            await asyncio.to_thread(self.store.save_manifest, dict(self.store.manifest))
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def fetch(self, client: httpx.AsyncClient, part_number: str, url: str) -> Optional[str]:
+        """Async counterpart of PDFStore.fetch: store the part's datasheet and return its hash"""
+        if not url or url == "N/A":
+            return None
+
+        entry = self.store.cached(part_number, url)
+        # Variants often share one datasheet URL; download it once and share the result
+        task = self._downloads.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._limited_download(client, url, entry))
+            self._downloads[url] = task
+            task.add_done_callback(lambda _: self._downloads.pop(url, None))
+        try:
+            result = await asyncio.shield(task)
+        except Exception as e:
+            self.store.stats["failed"] += 1
+            print(f"  ✗ Download failed ({part_number}): {e}")
+            return entry["sha256"] if entry else None
+
+        self.store.stats["downloaded" if result["modified"] else "not_modified"] += 1
+        self.store.record(part_number, url, result["sha256"], result["headers"])
+        return result["sha256"]
+
+    async def _limited_download(self, client: httpx.AsyncClient, url: str, entry: Optional[Dict]) -> Dict:
+        async with self._host_limit(url):
+            return await self._download(client, url, entry)
+
+    @staticmethod
+    def _read_validator(path: str) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("validator")
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _discard_partial(*paths: str):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _write_validator(path: str, validator: Optional[str]):
+        if validator:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"validator": validator}, f)
+        elif os.path.exists(path):
+            os.remove(path)  # Without a validator the partial can't be resumed safely
+
+    async def _download(self, client: httpx.AsyncClient, url: str, entry: Optional[Dict]) -> Dict:
+        """
+        Download `url` into the store unless `entry` is still current.
+
+        Returns {"sha256", "headers", "modified"}; on a 304 the headers are
+        the validators already on record. The partial file and its validator
+        (ETag/Last-Modified) stay on disk until the download succeeds, so
+        retries and later runs continue with a Range request. If-Range makes
+        the server send the whole file instead when it has changed.
+        """
+        os.makedirs(self.partial_dir, exist_ok=True)
+        name = hashlib.sha1(url.encode()).hexdigest()
+        partial_path = os.path.join(self.partial_dir, name + ".part")
+        validator_path = os.path.join(self.partial_dir, name + ".json")
+
+        for attempt in range(self.retries + 1):
+            headers = self.store.conditional_headers(entry)
+            offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+            validator = self._read_validator(validator_path) if offset else None
+            if validator:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+
+            try:
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and entry:
+                        # The stored copy is current; any partial is of an abandoned change
+                        self._discard_partial(partial_path, validator_path)
+                        validators = {"ETag": entry.get("etag"), "Last-Modified": entry.get("last_modified")}
+                        return {"sha256": entry["sha256"], "headers": validators, "modified": False}
+                    if response.status_code == 416:
+                        # The partial no longer fits the file; start over
+                        self._discard_partial(partial_path, validator_path)
+                        raise DownloadError("HTTP 416")
+                    if response.status_code in RETRY_STATUSES:
+                        raise DownloadError(f"HTTP {response.status_code}")
+                    response.raise_for_status()
+
+                    # 206 continues the partial file; a 200 (changed file or Range
+                    # ignored) starts over under the new response's validator
+                    resumed = response.status_code == 206
+                    if not resumed:
+                        self._write_validator(
+                            validator_path,
+                            response.headers.get("ETag") or response.headers.get("Last-Modified")
+                        )
+                    with open(partial_path, "ab" if resumed else "wb") as f:
+                        async for block in response.aiter_bytes(65536):
+                            f.write(block)
+
+                sha256 = await asyncio.to_thread(self.store.add_file, partial_path)
+                # add_file moves the partial into the store, or leaves it when the object exists
+                self._discard_partial(partial_path, validator_path)
+                return {"sha256": sha256, "headers": response.headers, "modified": True}
+
+            except (httpx.TransportError, DownloadError) as e:
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"  ↻ Retrying {url} in {delay:.1f}s ({e})")
+                await asyncio.sleep(delay)
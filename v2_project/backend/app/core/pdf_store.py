@@ -0,0 +1,145 @@
+"""
+Content-Addressed PDF Store
+Datasheets stored once per SHA-256, with a part -> hash manifest and
+conditional (ETag / Last-Modified) re-downloads
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional
+import requests
+
+from app.core.config import settings, get_pdf_dir_path
+
+MANIFEST_FILE = "manifest.json"
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFStore:
+    """
+    PDFs live at `{pdf_dir}/sha256/{hash[:2]}/{hash}.pdf`; `manifest.json`
+    maps each part number to the hash of its datasheet plus the URL, ETag
+    and Last-Modified it was fetched with.
+
+    A part whose entry and object exist is re-requested conditionally, so an
+    unchanged datasheet costs a 304 and an updated one gets a new hash. Parts
+    sharing a datasheet share one object.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or get_pdf_dir_path()
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+        self.session = requests.Session()
+        self.stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_manifest(self, manifest: Optional[Dict] = None):
+        """
+        Write the manifest atomically so a crash never leaves it half-written.
+        Pass a copy as `manifest` when writing from another thread.
+        """
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest if manifest is None else manifest, f,
+                      ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "sha256", sha256[:2], f"{sha256}.pdf")
+
+    def has_object(self, sha256: Optional[str]) -> bool:
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def cached(self, part_number: str, url: str) -> Optional[Dict]:
+        """Manifest entry for a part if it was fetched from `url` and its object exists"""
+        entry = self.manifest.get(part_number)
+        if entry and entry.get("url") == url and self.has_object(entry.get("sha256")):
+            return entry
+        return None
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def fetch(self, part_number: str, url: str) -> Optional[str]:
+        """
+        Make sure the part's current datasheet is stored and return its hash.
+
+        Falls back to the previously stored hash if the request fails.
+        """
+        if not url or url == "N/A":
+            return None
+
+        entry = self.cached(part_number, url)
+        try:
+            response = self.session.get(
+                url,
+                headers=self.conditional_headers(entry),
+                timeout=settings.TIMEOUT,
+                stream=True
+            )
+            if response.status_code == 304 and entry:
+                self.stats["not_modified"] += 1
+                return entry["sha256"]
+            response.raise_for_status()
+
+            digest = hashlib.sha256()
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for block in response.iter_content(chunk_size=65536):
+                        f.write(block)
+                        digest.update(block)
+                sha256 = self.add_file(tmp_path, digest.hexdigest())
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            self.record(part_number, url, sha256, response.headers)
+            self.stats["downloaded"] += 1
+            return sha256
+
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"  ✗ Download failed ({part_number}): {e}")
+            return entry["sha256"] if entry else None
+
+    def add_file(self, path: str, sha256: Optional[str] = None) -> str:
+        """Move a downloaded file into the store under its hash"""
+        sha256 = sha256 or sha256_file(path)
+        target = self.object_path(sha256)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        return sha256
+
+    def record(self, part_number: str, url: str, sha256: str, headers):
+        """Point a part at a stored hash, remembering the validators for next time"""
+        self.manifest[part_number] = {
+            "sha256": sha256,
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": datetime.utcnow().isoformat(),
+        }
@@ -4,19 +4,193 @@ Download, extract, and index product datasheets for RAG retrieval
 """
 import sys
 import os
+import argparse
+import signal
+import threading
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from typing import Any, List, Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
-import requests
 from elasticsearch import Elasticsearch, helpers
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
 import hashlib
 import pdfplumber
 from PIL import Image
 import io
 
 from app.core.config import settings, get_es_url, get_qdrant_url, get_pdf_dir_path
+from app.core.qdrant_collections import VersionedCollection
+from app.core.es_indices import VersionedIndex
+from app.core.es_pagination import iter_documents
+from app.core.bulk_indexer import BulkIndexer
+from app.core.datasheet_chunker import DatasheetChunker
+from app.core.chunk_vectorizer import ChunkVectorizer
+from app.core.pdf_store import PDFStore
+from app.core.pdf_downloader import AsyncPDFDownloader
+from app.core.extraction_cache import ExtractionCache, write_cached_pages
+
+
+class PDFExtractionTimeout(Exception):
+    """A PDF took longer than PDF_EXTRACT_TIMEOUT to extract"""
+
+
+@contextmanager
+def _time_limit(seconds: int):
+    """
+    Raise PDFExtractionTimeout after `seconds`.
+    
+    Uses SIGALRM, so it only applies on Unix in a main thread (which is
+    where pool workers run); elsewhere there is no limit. ExtractionPool
+    kills workers the alarm cannot interrupt.
+    """
+    if (seconds <= 0 or not hasattr(signal, "SIGALRM")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+    
+    def _timeout(signum, frame):
+        raise PDFExtractionTimeout(f"extraction exceeded {seconds}s")
+    
+    previous = signal.signal(signal.SIGALRM, _timeout)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _outside_tables(page, bboxes: List[tuple]):
+    """The page without the characters that belong to detected tables"""
+    if not bboxes:
+        return page
+    
+    def keep(obj) -> bool:
+        x = (obj["x0"] + obj["x1"]) / 2
+        y = (obj["top"] + obj["bottom"]) / 2
+        return not any(x0 <= x <= x1 and top <= y <= bottom for x0, top, x1, bottom in bboxes)
+    
+    return page.filter(keep)
+
+
+def extract_pdf_pages(pdf_path: str, timeout: int = 0, cache_path: Optional[str] = None) -> Dict:
+    """
+    Extract every page with pdfplumber as {"number", "text", "tables"}.
+    
+    Table cells are returned as rows in "tables" and left out of "text", so
+    chunking can keep them together. With `cache_path` the pages are also
+    written to the extraction cache. Module-level so it can run in a worker
+    process; returns {"pages": [...], "error": None} or
+    {"pages": None, "error": "..."}.
+    """
+    try:
+        with _time_limit(timeout):
+            pages = []
+            with pdfplumber.open(pdf_path) as pdf:
+                for number, page in enumerate(pdf.pages, 1):
+                    tables = page.find_tables()
+                    text = _outside_tables(page, [t.bbox for t in tables]).extract_text()
+                    pages.append({
+                        "number": number,
+                        "text": text or "",
+                        "tables": [t.extract() for t in tables],
+                    })
+    except Exception as e:
+        return {"pages": None, "error": f"{type(e).__name__}: {e}"}
+    
+    if cache_path:
+        try:
+            write_cached_pages(cache_path, pages)
+        except OSError as e:
+            print(f"  ⚠️  Could not cache extraction of {pdf_path}: {e}")
+    return {"pages": pages, "error": None}
+
+
+class ExtractionPool:
+    """
+    Process pool running extract_pdf_pages that survives hung workers.
+    
+    The in-worker alarm stops slow extractions, but not code stuck outside
+    the interpreter. A PDF still running twice its timeout after a worker
+    picked it up is reported as failed; the pool is killed and recreated
+    and the other unfinished PDFs are resubmitted.
+    """
+    
+    def __init__(self, workers: int, timeout: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.hang_limit = timeout * 2
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.in_flight: Dict[Future, Tuple[Any, tuple]] = {}  # future -> (key, args)
+        self.started: Dict[Future, float] = {}
+    
+    def __len__(self) -> int:
+        return len(self.in_flight)
+    
+    def submit(self, key: Any, pdf_path: str, cache_path: Optional[str] = None):
+        args = (pdf_path, self.timeout, cache_path)
+        self.in_flight[self.pool.submit(extract_pdf_pages, *args)] = (key, args)
+    
+    def completed(self, wait_all: bool = False) -> Iterator[Tuple[Any, Dict]]:
+        """Yield (key, result) as extractions finish: at least one, or all with `wait_all`"""
+        poll = min(self.timeout / 4, 5.0) if self.timeout > 0 else None
+        while self.in_flight:
+            done, _ = wait(self.in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, _ = self.in_flight.pop(future)
+                self.started.pop(future, None)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # A crashed worker surfaces here rather than in extract_pdf_pages
+                    result = {"pages": None, "error": f"worker failed: {e}"}
+                yield key, result
+            
+            for key in self._restart_if_hung():
+                yield key, {"pages": None, "error": f"worker hung for over {self.hang_limit}s and was killed"}
+            if done and not wait_all:
+                return
+    
+    def _restart_if_hung(self) -> List[Any]:
+        """Keys of hung extractions, after replacing the pool (none if nothing hung)"""
+        if self.timeout <= 0:
+            return []
+        now = time.monotonic()
+        for future in self.in_flight:
+            if future.running():
+                self.started.setdefault(future, now)
+        hung = [f for f, t in self.started.items() if not f.done() and now - t > self.hang_limit]
+        if not hung:
+            return []
+        
+        print(f"  ⚠️  {len(hung)} extraction worker(s) hung; restarting the pool")
+        self._kill()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        in_flight, self.in_flight, self.started = self.in_flight, {}, {}
+        for future, (key, args) in in_flight.items():
+            if future in hung:
+                continue
+            if future.done() and not future.exception():
+                self.in_flight[future] = (key, args)  # Finished before the kill
+            else:
+                self.in_flight[self.pool.submit(extract_pdf_pages, *args)] = (key, args)
+        return [in_flight[f][0] for f in hung]
+    
+    def _kill(self):
+        # ProcessPoolExecutor has no public way to stop busy workers before Python 3.14
+        for process in list((self.pool._processes or {}).values()):
+            process.kill()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+    
+    def close(self):
+        self.pool.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
 
 
 class PDFProcessor:
@@ -27,11 +201,26 @@ class PDFProcessor:
         self.qdrant = QdrantClient(url=get_qdrant_url())
         self.pdf_dir = get_pdf_dir_path()
         self.ollama_url = settings.OLLAMA_HOST
+        # Readers use the aliases; builds write into versioned indices/collections
+        self.pdf_indices = VersionedIndex(self.es, settings.ES_PDF_INDEX)
+        self.pdf_index = settings.ES_PDF_INDEX
+        self.vector_collections = VersionedCollection(self.qdrant, settings.QDRANT_PDF_COLLECTION)
+        self.vector_collection = settings.QDRANT_PDF_COLLECTION
+        self.workers = settings.PDF_WORKERS or os.cpu_count() or 1
+        self.bulk = BulkIndexer(self.es)
+        self.chunker = DatasheetChunker(settings.PDF_CHUNK_SIZE, settings.PDF_CHUNK_OVERLAP)
+        self.store = PDFStore(self.pdf_dir)
+        self.downloader = AsyncPDFDownloader(self.store)
+        self.extraction_cache = ExtractionCache(self.pdf_dir)
+        self.vectorizer: Optional[ChunkVectorizer] = None
+        # Per-run bookkeeping, keyed by PDF content hash
+        self.hash_parts: Dict[str, List[str]] = {}
+        self.hash_chunk_ids: Dict[str, List[str]] = {}
+        self.emitted_parts: Dict[str, int] = {}
+        self.reusable: set = set()
         
     def create_es_index(self):
-        """Create Elasticsearch index for PDF chunks"""
-        index_name = settings.ES_PDF_INDEX
-        
+        """Create a versioned Elasticsearch build index for PDF chunks"""
         mapping = {
             "settings": {
                 "number_of_shards": 1,
@@ -40,242 +229,314 @@ class PDFProcessor:
             "mappings": {
                 "properties": {
                     "part_number": {"type": "keyword"},
+                    "part_numbers": {"type": "keyword"},  # Every part sharing the datasheet
                     "product_name": {"type": "text"},
+                    "pdf_hash": {"type": "keyword"},
+                    "chunker": {"type": "keyword"},
                     "chunk_id": {"type": "keyword"},
                     "chunk_text": {"type": "text"},
                     "chunk_index": {"type": "integer"},
+                    "chunk_type": {"type": "keyword"},  # text | table
                     "pdf_url": {"type": "keyword"},
                     "local_path": {"type": "keyword"},
+                    "page_start": {"type": "integer"},
+                    "page_end": {"type": "integer"},
                     "page_hint": {"type": "keyword"},
                     "indexed_at": {"type": "date"}
                 }
             }
         }
         
-        if self.es.indices.exists(index=index_name):
-            self.es.indices.delete(index=index_name)
-        
-        self.es.indices.create(index=index_name, body=mapping)
-        print(f"✅ Created PDF index: {index_name}")
+        self.pdf_index = self.pdf_indices.create_build(mapping)
+    
+    def validate_es_index(self) -> bool:
+        """Finalize and validate the PDF chunk build"""
+        self.pdf_indices.finalize(self.pdf_index)
+        return self.pdf_indices.validate(self.pdf_index, sample_query={"exists": {"field": "chunk_text"}})
     
     def create_qdrant_collection(self):
-        """Create Qdrant collection for PDF vectors"""
-        collection_name = settings.QDRANT_PDF_COLLECTION
+        """Create a new versioned Qdrant collection to build PDF vectors into"""
+        self.vector_collection = self.vector_collections.create_build()
+    
+    def validate_qdrant_collection(self, expected_points: int, errors: int = 0) -> bool:
+        """Validate the PDF vector build (nothing vectorized or too many failures rejects it)"""
+        if expected_points <= 0:
+            print(f"  ✗ Validation failed: no chunks were vectorized into '{self.vector_collection}'")
+            return False
+        return self.vector_collections.validate(self.vector_collection, expected_points, errors)
+    
+    def publish(self, expected_points: int, errors: int = 0) -> bool:
+        """
+        Swap both aliases to the new builds, or neither.
         
-        try:
-            self.qdrant.delete_collection(collection_name=collection_name)
-        except:
-            pass
+        Chunks and vectors belong to the same run, so both builds are
+        validated before either alias moves; on failure both are discarded.
+        """
+        if not self.validate_es_index():
+            print(f"❌ PDF index build rejected. Alias '{settings.ES_PDF_INDEX}' unchanged.")
+        elif not self.validate_qdrant_collection(expected_points, errors):
+            print(f"❌ PDF vector build rejected. Aliases '{settings.ES_PDF_INDEX}' and "
+                  f"'{settings.QDRANT_PDF_COLLECTION}' unchanged.")
+        else:
+            self.pdf_indices.publish(self.pdf_index)
+            self.vector_collections.publish(self.vector_collection)
+            return True
         
-        self.qdrant.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(
-                size=settings.QDRANT_VECTOR_SIZE,
-                distance=Distance.COSINE
-            )
-        )
-        print(f"✅ Created PDF collection: {collection_name}")
+        self.pdf_indices.discard(self.pdf_index)
+        self.vector_collections.discard(self.vector_collection)
+        return False
     
     def download_pdf(self, url: str, part_number: str) -> Optional[str]:
-        """Download PDF and save to local directory"""
-        if not url or url == "N/A":
-            return None
-        
-        try:
-            # Create safe filename
-            filename = f"{part_number}.pdf"
-            filepath = os.path.join(self.pdf_dir, filename)
-            
-            # Skip if already downloaded
-            if os.path.exists(filepath):
-                return filepath
-            
-            # Download
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # Save
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            return filepath
-            
-        except Exception as e:
-            print(f"  ✗ Download failed: {e}")
+        """Fetch a part's datasheet into the store and return its local path"""
+        sha256 = self.store.fetch(part_number, url)
+        return self.store.object_path(sha256) if sha256 else None
+    
+    def extract_pages(self, pdf_path: str, cache_path: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Extract pages from PDF using pdfplumber (in this process)
+        """
+        result = extract_pdf_pages(pdf_path, settings.PDF_EXTRACT_TIMEOUT, cache_path)
+        if result['error']:
+            print(f"  ✗ PDF Extraction Error: {result['error']}")
             return None
+        return result['pages']
     
     def extract_text_simple(self, pdf_path: str) -> Optional[str]:
         """
-        Extract text from PDF using pdfplumber
+        Extract the plain text of a PDF (tables excluded)
         """
-        try:
-            text_content = []
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    # Extract text
-                    text = page.extract_text()
-                    if text:
-                        text_content.append(text)
-                    
-                    # Optional: access tables via page.extract_tables()
-            
-            return "\\n".join(text_content)
-        except Exception as e:
-            print(f"  ✗ PDF Extraction Error: {e}")
-            return None
+        pages = self.extract_pages(pdf_path)
+        return self.join_pages(pages) if pages else None
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-        """Split text into overlapping chunks"""
-        if not text:
-            return []
-        
-        chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
-            end = start + chunk_size
-            chunk = text[start:end]
-            chunks.append(chunk)
-            start += chunk_size - overlap
-        
-        return chunks
+    def join_pages(self, pages: List[Dict]) -> str:
+        """Join extracted page texts into one document"""
+        return "\n".join(page['text'] for page in pages if page['text'])
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding using Ollama"""
-        try:
-            response = requests.post(
-                f"{self.ollama_url}/api/embeddings",
-                json={
-                    "model": settings.OLLAMA_EMBEDDING_MODEL,
-                    "prompt": text
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return response.json()['embedding']
-            return None
-            
-        except Exception as e:
-            print(f"  ✗ Embedding error: {e}")
-            return None
+    @staticmethod
+    def page_hint(chunk: Dict) -> str:
+        if chunk['page_start'] == chunk['page_end']:
+            return f"p. {chunk['page_start']}"
+        return f"pp. {chunk['page_start']}-{chunk['page_end']}"
     
-    def process_pdf(self, product: Dict) -> Dict:
-        """Process a single product PDF"""
-        part_number = product.get('part_number')
-        pdf_url = product.get('pdf_url')
+    def chunk_actions(self, product: Dict, sha256: str, pages: List[Dict]) -> List[Dict]:
+        """Chunk an extracted datasheet into bulk index actions (once per content hash)"""
+        parts = self.hash_parts[sha256]
+        actions = []
         
-        stats = {
-            "downloaded": False,
-            "chunks_created": 0,
-            "chunks_indexed": 0
-        }
-        
-        # Download PDF
-        pdf_path = self.download_pdf(pdf_url, part_number)
-        if not pdf_path:
-            return stats
-        
-        stats['downloaded'] = True
-        
-        # Extract text (simplified for now)
-        text = self.extract_text_simple(pdf_path)
-        if not text:
-            return stats
-        
-        # Chunk text
-        chunks = self.chunk_text(text, settings.PDF_CHUNK_SIZE, settings.PDF_CHUNK_OVERLAP)
-        stats['chunks_created'] = len(chunks)
-        
-        # Index chunks
-        for idx, chunk_text in enumerate(chunks):
-            # Create chunk ID
-            chunk_id = hashlib.md5(f"{part_number}_{idx}".encode()).hexdigest()
+        for idx, chunk in enumerate(self.chunker.chunk_pages(pages)):
+            # Chunk ids follow the content, so every part sharing the PDF shares them
+            chunk_id = hashlib.md5(f"{sha256}_{idx}".encode()).hexdigest()
             
-            # Index to Elasticsearch
             doc = {
-                "part_number": part_number,
+                "part_number": product.get('part_number'),
+                "part_numbers": list(parts),
                 "product_name": product.get('name'),
+                "pdf_hash": sha256,
+                "chunker": self.chunker.signature,
                 "chunk_id": chunk_id,
-                "chunk_text": chunk_text,
+                "chunk_text": chunk['text'],
                 "chunk_index": idx,
-                "pdf_url": pdf_url,
-                "local_path": pdf_path,
-                "page_hint": f"Page ~{idx + 1}"
+                "chunk_type": chunk['chunk_type'],
+                "pdf_url": product.get('pdf_url'),
+                "local_path": self.store.object_path(sha256),
+                "page_start": chunk['page_start'],
+                "page_end": chunk['page_end'],
+                "page_hint": self.page_hint(chunk)
             }
             
-            try:
-                self.es.index(index=settings.ES_PDF_INDEX, id=chunk_id, document=doc)
-                stats['chunks_indexed'] += 1
-            except Exception as e:
-                print(f"  ✗ ES indexing error: {e}")
-            
-            # Generate and store vector (optional - can be slow)
-            # Uncomment if you want vectors for PDF chunks
-            # vector = self.generate_embedding(chunk_text)
-            # if vector:
-            #     point = PointStruct(
-            #         id=chunk_id,
-            #         vector=vector,
-            #         payload=doc
-            #     )
-            #     self.qdrant.upsert(
-            #         collection_name=settings.QDRANT_PDF_COLLECTION,
-            #         points=[point]
-            #     )
+            actions.append({"_index": self.pdf_index, "_id": chunk_id, "_source": doc})
         
-        return stats
+        self.hash_chunk_ids[sha256] = [action['_id'] for action in actions]
+        self.emitted_parts[sha256] = len(parts)
+        return actions
+    
+    def load_reusable_hashes(self):
+        """Hashes whose chunks in the live index were built with the current chunker"""
+        if not self.pdf_indices.has_mapping({"mappings": {"properties": {"pdf_hash": {}, "chunker": {}}}}):
+            return
+        # One bucket per datasheet instead of one hit per chunk
+        body = {
+            "size": 0,
+            "query": {"term": {"chunker": self.chunker.signature}},
+            "aggs": {"hashes": {"composite": {
+                "size": 1000,
+                "sources": [{"pdf_hash": {"terms": {"field": "pdf_hash"}}}]
+            }}}
+        }
+        while True:
+            result = self.es.search(index=settings.ES_PDF_INDEX, body=body)
+            agg = result['aggregations']['hashes']
+            self.reusable.update(bucket['key']['pdf_hash'] for bucket in agg['buckets'])
+            if not agg['buckets'] or 'after_key' not in agg:
+                break
+            body['aggs']['hashes']['composite']['after'] = agg['after_key']
+        print(f"♻️  {len(self.reusable)} datasheets already processed in '{settings.ES_PDF_INDEX}'")
+    
+    def reused_actions(self, hashes: List[str], stats: Dict) -> Iterator[Dict]:
+        """Copy the chunks of already-processed PDFs from the live index into the build"""
+        query = {"terms": {"pdf_hash": hashes}}
+        for hit in iter_documents(self.es, settings.ES_PDF_INDEX, query):
+            doc = hit['_source']
+            sha256 = doc['pdf_hash']
+            doc['part_numbers'] = list(self.hash_parts[sha256])
+            self.hash_chunk_ids.setdefault(sha256, []).append(hit['_id'])
+            self.emitted_parts[sha256] = len(doc['part_numbers'])
+            self.vectorizer.reuse(doc, settings.QDRANT_PDF_COLLECTION)
+            stats['chunks_reused'] += 1
+            yield {"_index": self.pdf_index, "_id": hit['_id'], "_source": doc}
     
-    def process_all_pdfs(self):
-        """Process all product PDFs"""
-        # Get products with PDFs
-        result = self.es.search(
-            index=settings.ES_PRODUCTS_INDEX,
-            body={
-                "query": {
-                    "bool": {
-                        "must_not": {"term": {"pdf_url": "N/A"}},
-                        "must": {"exists": {"field": "pdf_url"}}
-                    }
-                },
-                "size": 1000
+    def _extraction_actions(self, product: Dict, sha256: str, result: Dict, stats: Dict) -> List[Dict]:
+        """Chunk actions for one finished extraction from the worker pool"""
+        if result['error']:
+            print(f"  ✗ PDF Extraction Error ({product.get('part_number')}): {result['error']}")
+            stats['extract_errors'] += 1
+            return []
+        
+        actions = self.chunk_actions(product, sha256, result['pages'])
+        for action in actions:
+            self.vectorizer.add(action['_source'])
+        stats['chunks_created'] += len(actions)
+        return actions
+    
+    def iter_chunk_actions(self, products: Iterable[Dict], total: int, stats: Dict) -> Iterator[Dict]:
+        """
+        Take PDFs from the async downloader as they arrive, extract them in
+        the worker pool and yield chunk actions as extractions finish, so
+        downloads, extraction and bulk requests overlap.
+        
+        Each content hash is handled once: parts sharing a datasheet only add
+        themselves to its part list, hashes already processed by an earlier
+        run are copied from the live index, and PDFs in the extraction cache
+        are re-chunked from it instead of being parsed again.
+        """
+        print(f"⚙️  Extracting with {self.workers} worker processes")
+        with ExtractionPool(self.workers, settings.PDF_EXTRACT_TIMEOUT) as pool:
+            to_reuse: List[str] = []
+            
+            def collect(wait_all: bool = False) -> Iterator[Dict]:
+                for (product, sha256), result in pool.completed(wait_all):
+                    yield from self._extraction_actions(product, sha256, result, stats)
+            
+            for i, (product, sha256) in enumerate(self.downloader.downloads(products), 1):
+                part_number = product.get('part_number')
+                print(f"[{i}/{total}] Processing {part_number}...")
+                if not sha256:
+                    continue
+                stats['downloaded'] += 1
+                
+                parts = self.hash_parts.setdefault(sha256, [])
+                parts.append(part_number)
+                if len(parts) > 1:
+                    stats['shared'] += 1
+                    continue
+                
+                if sha256 in self.reusable:
+                    to_reuse.append(sha256)
+                    if len(to_reuse) >= 100:
+                        yield from self.reused_actions(to_reuse, stats)
+                        to_reuse = []
+                    continue
+                
+                # Keep the pool busy without queueing every PDF up front
+                if len(pool) >= self.workers * 2:
+                    yield from collect()
+                
+                pages = self.extraction_cache.get(sha256)
+                if pages is not None:
+                    yield from self._extraction_actions(product, sha256, {"pages": pages, "error": None}, stats)
+                    continue
+                
+                pool.submit((product, sha256), self.store.object_path(sha256), self.extraction_cache.path(sha256))
+            
+            if to_reuse:
+                yield from self.reused_actions(to_reuse, stats)
+            yield from collect(wait_all=True)
+    
+    def late_part_updates(self) -> Dict[str, List[str]]:
+        """Hashes whose part list grew after their chunks were emitted"""
+        return {
+            sha256: parts
+            for sha256, parts in self.hash_parts.items()
+            if sha256 in self.emitted_parts and len(parts) > self.emitted_parts[sha256]
+        }
+    
+    def process_all_pdfs(self, reuse: bool = True):
+        """
+        Process all product PDFs
+        
+        Downloads run concurrently on an async client and land in the
+        content-addressed PDFStore; text extraction (CPU-bound) runs in a pool of PDF_WORKERS processes with a
+        PDF_EXTRACT_TIMEOUT per file. Chunks from all PDFs stream into
+        BulkIndexer (byte-sized requests) while the build index has refresh
+        disabled until it is finalized, and into ChunkVectorizer for batched
+        embedding and Qdrant upserts. With `reuse`, datasheets whose hash is
+        already in the live index are copied rather than re-processed.
+        """
+        # Get products with PDFs (all of them, paged through a point-in-time)
+        query = {
+            "bool": {
+                "must_not": {"term": {"pdf_url": "N/A"}},
+                "must": {"exists": {"field": "pdf_url"}}
             }
+        }
+        total = self.es.count(index=settings.ES_PRODUCTS_INDEX, query=query)['count']
+        # Pages are consumed slowly (downloads), so keep the point-in-time alive longer
+        products = (
+            hit['_source']
+            for hit in iter_documents(self.es, settings.ES_PRODUCTS_INDEX, query,
+                                      page_size=100, keep_alive="30m")
         )
         
-        products = [hit['_source'] for hit in result['hits']['hits']]
-        total = len(products)
-        
         print(f"\n📊 Found {total} products with PDFs")
-        print("⏳ Note: Full PDF processing requires PyPDF2/pdfplumber")
-        print("   Currently using placeholder extraction\n")
+        if reuse:
+            self.load_reusable_hashes()
         
         stats = {
             "total": total,
             "downloaded": 0,
+            "shared": 0,
+            "extract_errors": 0,
             "chunks_created": 0,
-            "chunks_indexed": 0
+            "chunks_reused": 0,
+            "chunks_indexed": 0,
+            "chunks_vectorized": 0,
+            "vector_errors": 0
         }
         
-        for i, product in enumerate(products, 1):
-            print(f"[{i}/{total}] Processing {product.get('part_number')}...")
-            
-            result = self.process_pdf(product)
-            
-            if result['downloaded']:
-                stats['downloaded'] += 1
-            stats['chunks_created'] += result['chunks_created']
-            stats['chunks_indexed'] += result['chunks_indexed']
-            
-            # Small delay
-            time.sleep(0.2)
+        self.vectorizer = ChunkVectorizer(self.qdrant, self.vector_collection)
+        report = self.bulk.index(self.iter_chunk_actions(products, total, stats))
+        report.print_report("PDF chunk indexing")
+        stats['chunks_indexed'] = report.docs
+        
+        print("⏳ Embedding remaining chunks...")
+        self.vectorizer.close()
+        
+        # Parts found after their shared datasheet was already sent
+        late = self.late_part_updates()
+        if late:
+            self.bulk.index(
+                {"_op_type": "update", "_index": self.pdf_index, "_id": chunk_id, "doc": {"part_numbers": parts}}
+                for sha256, parts in late.items()
+                for chunk_id in self.hash_chunk_ids[sha256]
+            )
+            for sha256, parts in late.items():
+                self.vectorizer.set_part_numbers(self.hash_chunk_ids[sha256], parts)
+        
+        stats['chunks_vectorized'] = self.vectorizer.stored
+        stats['vector_errors'] = self.vectorizer.errors
+        stats['store'] = dict(self.store.stats)
+        stats['extraction_cache'] = dict(self.extraction_cache.stats)
         
         return stats
 
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Download, extract and index product datasheets")
+    parser.add_argument("--reprocess", action="store_true",
+                        help="Extract and embed every PDF, even ones already in the live index")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("📄 SICK Product PDF Processing")
     print("=" * 70)
@@ -286,24 +547,35 @@ def main():
     processor = PDFProcessor()
     
     # Step 1: Create indices
-    print("[Step 1/3] Creating storage indices...")
+    print("[Step 1/3] Creating storage build indices...")
     processor.create_es_index()
     processor.create_qdrant_collection()
     
     # Step 2: Process PDFs
     print("\n[Step 2/3] Processing PDFs...")
-    stats = processor.process_all_pdfs()
+    stats = processor.process_all_pdfs(reuse=not args.reprocess)
     
     print(f"\n✅ PDF processing completed!")
     print(f"  - Total PDFs found: {stats['total']}")
-    print(f"  - Downloaded: {stats['downloaded']}")
+    print(f"  - Available: {stats['downloaded']} "
+          f"({stats['store']['downloaded']} downloaded, {stats['store']['not_modified']} not modified, "
+          f"{stats['store']['failed']} failed)")
+    print(f"  - Sharing another part's datasheet: {stats['shared']}")
+    print(f"  - Extractions read from cache: {stats['extraction_cache']['hits']}")
+    print(f"  - Extraction errors: {stats['extract_errors']}")
     print(f"  - Text chunks created: {stats['chunks_created']}")
+    print(f"  - Chunks reused from the live index: {stats['chunks_reused']}")
     print(f"  - Chunks indexed: {stats['chunks_indexed']}")
+    print(f"  - Chunks vectorized: {stats['chunks_vectorized']} ({stats['vector_errors']} failed)")
     
-    # Step 3: Verify
-    print("\n[Step 3/3] Verifying...")
-    count = processor.es.count(index=settings.ES_PDF_INDEX)['count']
+    # Step 3: Verify and publish
+    print("\n[Step 3/3] Verifying and publishing...")
+    # The build has automatic refresh disabled; refresh once so the count is accurate
+    processor.es.indices.refresh(index=processor.pdf_index)
+    count = processor.es.count(index=processor.pdf_index)['count']
     print(f"📊 Total chunks in Elasticsearch: {count}")
+    if not processor.publish(expected_points=stats['chunks_vectorized'], errors=stats['vector_errors']):
+        return 1
     
     print("\n" + "=" * 70)
     print("✨ PDF processing complete!")
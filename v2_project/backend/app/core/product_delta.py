@@ -0,0 +1,94 @@
+"""
+Delta Ingestion
+Send only new, changed and removed products to Elasticsearch, based on content hashes
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, Iterator, Optional, Set
+from elasticsearch import Elasticsearch
+
+from app.core.config import settings
+from app.core.es_pagination import iter_documents
+
+# Fields that change on every run without the product changing
+HASH_EXCLUDED_FIELDS = ("indexed_at", "content_hash")
+
+
+def compute_content_hash(doc: Dict) -> str:
+    """Stable SHA-256 of a product document, ignoring volatile fields"""
+    content = {k: v for k, v in doc.items() if k not in HASH_EXCLUDED_FIELDS}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def fetch_index_hashes(es: Elasticsearch, index: str) -> Dict[str, str]:
+    """Map document id -> content_hash for everything currently in the index"""
+    hashes = {}
+    for hit in iter_documents(es, index, source=["content_hash"]):
+        hashes[hit['_id']] = hit['_source'].get('content_hash')
+    return hashes
+
+
+class DeltaPlanner:
+    """
+    Filter a stream of index actions down to inserts and updates, then emit
+    deletes for ids that exist in the index but were absent from the source.
+    """
+
+    def __init__(self, existing: Dict[str, str]):
+        self.existing = existing
+        self.seen: Set[str] = set()
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    def filter_changed(self, actions: Iterable[Dict]) -> Iterator[Dict]:
+        for action in actions:
+            doc_id = action['_id']
+            self.seen.add(doc_id)
+
+            if doc_id not in self.existing:
+                self.stats['inserted'] += 1
+            elif self.existing[doc_id] == action['_source']['content_hash']:
+                self.stats['unchanged'] += 1
+                continue
+            else:
+                self.stats['updated'] += 1
+            yield action
+
+    def merge(self, seen: Iterable[str], stats: Dict[str, int]):
+        """Fold in the ids and counts of a planner that filtered part of the source"""
+        self.seen.update(seen)
+        for key, value in stats.items():
+            self.stats[key] += value
+    
+    def delete_actions(self, index: str, source_errors: int = 0) -> Iterator[Dict]:
+        missing = [doc_id for doc_id in self.existing if doc_id not in self.seen]
+        if not missing:
+            return
+
+        # Rows that failed to parse were never seen; don't delete their products
+        if source_errors:
+            print(f"⚠️  {source_errors} source rows failed to parse; skipping {len(missing)} deletes")
+            return
+
+        # A truncated or broken source file must not wipe the catalog
+        kept = len(self.existing) - len(missing)
+        if kept < len(self.existing) * settings.ES_MIN_DOC_RATIO:
+            print(f"⚠️  Source is missing {len(missing)} of {len(self.existing)} indexed products; "
+                  f"skipping deletes (below ES_MIN_DOC_RATIO={settings.ES_MIN_DOC_RATIO})")
+            return
+
+        for doc_id in missing:
+            self.stats['deleted'] += 1
+            yield {"_op_type": "delete", "_index": index, "_id": doc_id}
+
+    def plan(self, actions: Iterable[Dict], index: str, source_stats: Optional[Dict] = None) -> Iterator[Dict]:
+        """Changed products first, then deletes once the source is exhausted"""
+        yield from self.filter_changed(actions)
+        yield from self.delete_actions(index, (source_stats or {}).get('errors', 0))
+
+    def print_summary(self):
+        print("\n🔁 Delta summary:")
+        print(f"  - Inserted: {self.stats['inserted']}")
+        print(f"  - Updated: {self.stats['updated']}")
+        print(f"  - Unchanged (skipped): {self.stats['unchanged']}")
+        print(f"  - Deleted: {self.stats['deleted']}")
@@ -0,0 +1,182 @@
+"""
+Product Substitution Graph
+Successor chains and accessories parsed from the catalog, persisted next to
+the product index for instant substitution lookups
+"""
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from elasticsearch import Elasticsearch
+
+from app.core.config import get_product_graph_path
+from app.core.es_pagination import iter_documents
+
+# Scraper format: "Name (Part: 1234567) | URL: https://..."
+_SUCCESSOR_RE = re.compile(r"^(?P<name>.*?)\s*\(Part:\s*(?P<part>[^)]+)\)(?:\s*\|\s*URL:\s*(?P<url>\S+))?")
+# Scraper format per accessory: "Name (1234567)", joined with "|"
+_ACCESSORY_RE = re.compile(r"^(?P<name>.*?)\s*\((?P<part>[^()]+)\)\s*$")
+
+GRAPH_SOURCE_FIELDS = ["part_number", "name", "phased_out", "successor_product", "suitable_accessories"]
+
+
+def parse_successor(text: Optional[str]) -> Optional[Dict]:
+    """Parse a successor_product string into {"part_number", "name", "url"}"""
+    if not text or text == "N/A":
+        return None
+    match = _SUCCESSOR_RE.match(text.strip())
+    if not match or match.group("part").strip() in ("", "N/A"):
+        return None
+    return {
+        "part_number": match.group("part").strip(),
+        "name": match.group("name").strip(),
+        "url": match.group("url"),
+    }
+
+
+def parse_accessories(value) -> List[Dict]:
+    """Parse suitable_accessories ("Name (part)|...", or a list) into [{"part_number", "name"}]"""
+    if not value or value == "N/A":
+        return []
+    items = value if isinstance(value, list) else str(value).split("|")
+    accessories = []
+    for item in items:
+        match = _ACCESSORY_RE.match(item.strip())
+        if match and match.group("part").strip() not in ("", "N/A"):
+            accessories.append({"part_number": match.group("part").strip(), "name": match.group("name").strip()})
+    return accessories
+
+
+class ProductGraph:
+    """
+    Adjacency lists for substitution and cross-selling.
+
+    `successors` maps a part to its direct successor, `accessories` to its
+    accessory parts, `phased_out` lists discontinued parts and `names` keeps
+    display names for every part seen (including successors and accessories
+    that are not in the catalog themselves).
+    """
+
+    def __init__(self):
+        self.successors: Dict[str, str] = {}
+        self.accessories: Dict[str, List[str]] = {}
+        self.phased_out = set()
+        self.names: Dict[str, str] = {}
+        self.meta: Dict = {}
+
+    def __contains__(self, part_number: str) -> bool:
+        return part_number in self.names
+
+    def add_product(self, doc: Dict):
+        """Add a product document (as indexed) to the graph"""
+        part_number = doc.get("part_number")
+        if not part_number:
+            return
+        self.names[part_number] = doc.get("name") or self.names.get(part_number, "")
+        if doc.get("phased_out"):
+            self.phased_out.add(part_number)
+
+        successor = parse_successor(doc.get("successor_product"))
+        if successor and successor["part_number"] != part_number:
+            self.successors[part_number] = successor["part_number"]
+            if not self.names.get(successor["part_number"]):
+                self.names[successor["part_number"]] = successor["name"]
+
+        accessories = parse_accessories(doc.get("suitable_accessories"))
+        if accessories:
+            self.accessories[part_number] = [a["part_number"] for a in accessories]
+            for accessory in accessories:
+                if not self.names.get(accessory["part_number"]):
+                    self.names[accessory["part_number"]] = accessory["name"]
+
+    def successor_chain(self, part_number: str, max_depth: int = 10) -> List[str]:
+        """Successors in order (A -> B -> C gives [B, C]); stops on cycles"""
+        chain = []
+        seen = {part_number}
+        current = part_number
+        while current in self.successors and len(chain) < max_depth:
+            current = self.successors[current]
+            if current in seen:
+                break
+            chain.append(current)
+            seen.add(current)
+        return chain
+
+    def replacement(self, part_number: str) -> Optional[str]:
+        """The newest part in the successor chain, if any"""
+        chain = self.successor_chain(part_number)
+        return chain[-1] if chain else None
+
+    def accessories_for(self, part_number: str) -> List[str]:
+        """Accessories of a part, falling back to its replacement's when it has none"""
+        if part_number in self.accessories:
+            return self.accessories[part_number]
+        replacement = self.replacement(part_number)
+        return self.accessories.get(replacement, []) if replacement else []
+
+    def to_dict(self) -> Dict:
+        return {
+            "meta": self.meta,
+            "names": self.names,
+            "successors": self.successors,
+            "accessories": self.accessories,
+            "phased_out": sorted(self.phased_out),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProductGraph":
+        graph = cls()
+        graph.meta = data.get("meta", {})
+        graph.names = data.get("names", {})
+        graph.successors = data.get("successors", {})
+        graph.accessories = data.get("accessories", {})
+        graph.phased_out = set(data.get("phased_out", []))
+        return graph
+
+    @classmethod
+    def from_index(cls, es: Elasticsearch, index: str) -> "ProductGraph":
+        """Build the graph from every product currently in `index`"""
+        graph = cls()
+        for hit in iter_documents(es, index, source=GRAPH_SOURCE_FIELDS):
+            graph.add_product(hit["_source"])
+        graph.meta = {"index": index, "built_at": datetime.utcnow().isoformat()}
+        return graph
+
+    def save(self, path: Optional[str] = None):
+        """Write the graph atomically so readers never see a partial file"""
+        path = path or get_product_graph_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "ProductGraph":
+        with open(path or get_product_graph_path(), "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+class ProductGraphStore:
+    """Lazily load the persisted graph and reload it when ingest rewrites the file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_product_graph_path()
+        self._graph = ProductGraph()
+        self._mtime: Optional[float] = None
+
+    def get(self) -> ProductGraph:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return self._graph
+        if mtime != self._mtime:
+            self._graph = ProductGraph.load(self.path)
+            self._mtime = mtime
+        return self._graph
+
+    def find_part_numbers(self, text: str) -> List[str]:
+        """Part numbers from the graph mentioned in free text"""
+        graph = self.get()
+        tokens = re.findall(r"[A-Za-z0-9][A-Za-z0-9\-./]{3,}", text or "")
+        return [token for token in dict.fromkeys(tokens) if token in graph]
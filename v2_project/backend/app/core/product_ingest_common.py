@@ -0,0 +1,297 @@
+"""
+Product Ingestion Common
+Index mapping, document building, delta and publish steps shared by the
+CSV and JSON product ingesters; each script only adds its input parsing
+"""
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from elasticsearch import Elasticsearch
+
+from app.core.es_indices import VersionedIndex
+from app.core.bulk_indexer import BulkIndexer, BulkReport
+from app.core.catalog_snapshot import to_catalog_record
+from app.core.spec_normalizer import SPEC_NUM_DYNAMIC_TEMPLATES, SPEC_NUM_MAPPING, normalize_specifications
+from app.core.product_graph import ProductGraph, parse_accessories, parse_successor
+from app.core.product_delta import DeltaPlanner, compute_content_hash, fetch_index_hashes
+from app.core.config import settings, get_es_url
+
+
+class BaseProductIngester:
+    """
+    Build product documents and write them to Elasticsearch, either into a
+    new versioned index (full rebuild, then publish) or as a delta against
+    the live index. Subclasses implement iter_rows() for their input format.
+    """
+    
+    def __init__(self):
+        self.es = Elasticsearch([get_es_url()], request_timeout=30)
+        # Search reads the alias; each ingest builds a new versioned index
+        self.alias = settings.ES_PRODUCTS_INDEX
+        self.versions = VersionedIndex(self.es, self.alias)
+        self.index_name = self.alias
+        self.sample_part_number = None
+        self.bulk = BulkIndexer(self.es)
+        self.delta = None
+    
+    def index_mapping(self) -> Dict:
+        """Settings and mappings for product indices"""
+        return {
+            "settings": {
+                "number_of_shards": 1,
+                "number_of_replicas": 0,
+                "index.mapping.total_fields.limit": 5000,
+                "analysis": {
+                    "analyzer": {
+                        "product_analyzer": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding"]
+                        }
+                    }
+                }
+            },
+            "mappings": {
+                "dynamic_templates": SPEC_NUM_DYNAMIC_TEMPLATES,
+                "properties": {
+                    "part_number": {"type": "keyword"},
+                    "url": {"type": "keyword"},
+                    "name": {
+                        "type": "text",
+                        "analyzer": "product_analyzer",
+                        "fields": {
+                            "keyword": {"type": "keyword"}
+                        }
+                    },
+                    "description": {
+                        "type": "text",
+                        "analyzer": "product_analyzer"
+                    },
+                    "category": {
+                        "type": "text",
+                        "fields": {
+                            "keyword": {"type": "keyword"}
+                        }
+                    },
+                    "actual_part_no": {"type": "keyword"},
+                    "brand": {"type": "keyword"},
+                    "price_teaser": {"type": "text"},
+                    "phased_out": {"type": "boolean"},
+                    "successor_product": {"type": "text"},
+                    "successor_part_number": {"type": "keyword"},
+                    "certificates": {"type": "keyword"},
+                    "specifications": {"type": "flattened"},
+                    "spec_num": SPEC_NUM_MAPPING,
+                    "suitable_accessories": {"type": "text"},
+                    "accessory_part_numbers": {"type": "keyword"},
+                    "image_urls": {"type": "keyword"},
+                    "local_image_paths": {"type": "keyword"},
+                    "pdf_url": {"type": "keyword"},
+                    "content_hash": {"type": "keyword"},
+                    "indexed_at": {"type": "date"}
+                }
+            }
+        }
+    
+    def create_index(self):
+        """Create a versioned Elasticsearch build index with proper mapping"""
+        # Build into a new versioned index; the live alias keeps serving
+        self.index_name = self.versions.create_build(self.index_mapping())
+    
+    def start_delta(self):
+        """Ingest into the live index, sending only new, changed and removed products"""
+        self.index_name = self.alias
+        print(f"🔍 Fetching content hashes from '{self.alias}'...")
+        self.delta = DeltaPlanner(fetch_index_hashes(self.es, self.alias))
+        print(f"✅ {len(self.delta.existing)} products currently indexed")
+    
+    def publish_index(self) -> bool:
+        """Finalize and validate the build, then swap the alias to it"""
+        self.versions.finalize(self.index_name)
+        
+        sample_query = {"term": {"part_number": self.sample_part_number}} if self.sample_part_number else None
+        if not self.versions.validate(self.index_name, sample_query=sample_query):
+            self.versions.discard(self.index_name)
+            return False
+        
+        self.versions.publish(self.index_name)
+        return True
+    
+    def parse_json_field(self, value: str) -> Optional[Dict]:
+        """Parse JSON string fields safely (snapshot rows are already dicts)"""
+        if not value or value == "N/A":
+            return None
+        if isinstance(value, dict):
+            return value
+        try:
+            # Handle escaped quotes
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    
+    def parse_boolean(self, value: str) -> bool:
+        """Convert string to boolean"""
+        if isinstance(value, bool):
+            return value
+        return str(value).lower() in ['yes', 'true', '1']
+    
+    def parse_list(self, value: str, delimiter: str = '|') -> List[str]:
+        """Parse delimited string to list"""
+        if not value or value == "N/A":
+            return []
+        if isinstance(value, list):
+            return value
+        return [item.strip() for item in value.split(delimiter) if item.strip()]
+    
+    def parse_text(self, value, delimiter: str = '|') -> str:
+        """Normalize a text field (lists from snapshots are joined)"""
+        if value is None or value == "N/A":
+            return ""
+        if isinstance(value, list):
+            return delimiter.join(value)
+        return str(value).strip()
+    
+    def process_product(self, row: Dict) -> Dict:
+        """Transform a CSV row, JSON item or snapshot row to an Elasticsearch document"""
+        row = to_catalog_record(row)
+        doc = {
+            "part_number": self.parse_text(row.get("part_number")),
+            "url": self.parse_text(row.get("url")),
+            "name": self.parse_text(row.get("name")),
+            "description": self.parse_text(row.get("description")),
+            "category": self.parse_text(row.get("category")),
+            "actual_part_no": self.parse_text(row.get("actual_part_no")),
+            "brand": self.parse_text(row.get("brand")) or settings.PRODUCTS_BRAND,
+            "price_teaser": self.parse_text(row.get("price_teaser")),
+            "phased_out": self.parse_boolean(row.get("phased_out", "No")),
+            "successor_product": self.parse_text(row.get("successor_product")),
+            "certificates": self.parse_list(row.get("certificates", "")),
+            "specifications": self.parse_json_field(row.get("specifications", "")),
+            "suitable_accessories": self.parse_text(row.get("suitable_accessories")),
+            "image_urls": self.parse_list(row.get("image_urls", "")),
+            "local_image_paths": self.parse_list(row.get("local_image_paths", "")),
+            "pdf_url": self.parse_text(row.get("pdf_url")),
+            "indexed_at": datetime.utcnow().isoformat()
+        }
+        doc["spec_num"] = normalize_specifications(doc["specifications"])
+        successor = parse_successor(doc["successor_product"])
+        doc["successor_part_number"] = successor["part_number"] if successor else None
+        doc["accessory_part_numbers"] = [a["part_number"] for a in parse_accessories(doc["suitable_accessories"])]
+        doc["content_hash"] = compute_content_hash(doc)
+        return doc
+    
+    def iter_rows(self) -> Iterator[Dict]:
+        """Yield raw product rows from the input"""
+        raise NotImplementedError
+    
+    def generate_actions(self, stats: Dict, rows: Optional[Iterable[Dict]] = None) -> Iterator[Dict]:
+        """Turn product rows (default: iter_rows()) into bulk actions, counting into stats"""
+        for row in (self.iter_rows() if rows is None else rows):
+            try:
+                doc = self.process_product(row)
+                
+                # Skip if no part number
+                if not doc['part_number']:
+                    continue
+                
+                stats['processed'] += 1
+                if self.sample_part_number is None:
+                    self.sample_part_number = doc['part_number']
+                
+                yield {
+                    "_index": self.index_name,
+                    "_id": doc['part_number'],
+                    "_source": doc
+                }
+            
+            except Exception as e:
+                print(f"  ✗ Error processing row: {e}")
+                stats['errors'] += 1
+    
+    def finish_bulk(self, report: BulkReport, stats: Dict) -> Dict:
+        """Report a bulk run, refresh the index and return the ingest result"""
+        report.print_report("Product ingest")
+        if self.delta:
+            self.delta.print_summary()
+        
+        # Refresh index and invalidate cached facets
+        self.es.indices.refresh(index=self.index_name)
+        self.versions.bump_generation(self.index_name)
+        count = self.es.count(index=self.index_name)['count']
+        
+        return {
+            "success": True,
+            "processed": stats['processed'],
+            "indexed": count,
+            "errors": stats['errors'] + report.errors
+        }
+    
+    def verify_index(self):
+        """Verify index and show sample"""
+        count = self.es.count(index=self.index_name)['count']
+        print(f"\n📊 Total products indexed: {count}")
+        
+        result = self.es.search(
+            index=self.index_name,
+            body={"query": {"match_all": {}}, "size": 1}
+        )
+        
+        if result['hits']['hits']:
+            sample = result['hits']['hits'][0]['_source']
+            print(f"\n📦 Sample product:")
+            print(f"  Part Number: {sample.get('part_number')}")
+            print(f"  Name: {sample.get('name')}")
+            print(f"  Category: {sample.get('category')}")
+            print(f"  URL: {(sample.get('url') or '')[:60]}...")
+    
+    def rebuild_graph(self):
+        """Rebuild the substitution graph from whatever the alias now serves"""
+        graph = ProductGraph.from_index(self.es, self.alias)
+        graph.save()
+        print(f"🔗 Product graph: {len(graph.successors)} successors, {len(graph.accessories)} accessory lists")
+
+
+def run_ingest(ingester: BaseProductIngester, full: bool, source: str) -> int:
+    """
+    Steps shared by the ingest scripts: build or delta-update the index,
+    verify and publish it, then rebuild the product graph. Returns an exit code.
+    """
+    # Mapping changes (new fields) can't be applied to the live index in place
+    full = full or not ingester.versions.has_mapping(ingester.index_mapping())
+    
+    # Step 1: Create index (full rebuild) or load hashes (delta)
+    if full:
+        print("\n[Step 1/3] Creating Elasticsearch build index...")
+        ingester.create_index()
+    else:
+        print("\n[Step 1/3] Preparing delta update of live index...")
+        ingester.start_delta()
+    
+    # Step 2: Bulk index
+    print(f"\n[Step 2/3] Importing products from {source}...")
+    result = ingester.bulk_index_products()
+    
+    if result['success']:
+        print(f"\n✅ Import completed!")
+        print(f"  - Processed: {result['processed']} rows")
+        print(f"  - Indexed: {result['indexed']} products")
+        print(f"  - Errors: {result['errors']}")
+    else:
+        print(f"\n❌ Import failed: {result.get('error')}")
+        if full:
+            ingester.versions.discard(ingester.index_name)
+        return 1
+    
+    # Step 3: Verify and publish
+    print("\n[Step 3/3] Verifying index...")
+    ingester.verify_index()
+    if full and not ingester.publish_index():
+        print(f"\n❌ Build rejected. Alias '{ingester.alias}' still serves the previous index.")
+        return 1
+    
+    ingester.rebuild_graph()
+    
+    print("\n" + "=" * 70)
+    print("✨ Ingestion complete! Products ready for search.")
+    print("=" * 70)
+    return 0
@@ -0,0 +1,243 @@
+"""
+Versioned Qdrant Collections
+Blue/green rebuilds behind a Qdrant alias so search never sees an empty collection
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    HnswConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    QuantizationSearchParams,
+    SearchParams,
+    PayloadSchemaType,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+)
+
+from app.core.config import settings
+
+
+@dataclass
+class CollectionProfile:
+    """
+    Declarative tuning for a Qdrant collection.
+
+    With int8 scalar quantization the quantized vectors stay in RAM while
+    the float32 originals live on disk and are only read for rescoring,
+    which cuts vector RAM roughly 4x.
+    """
+    vector_size: int = field(default_factory=lambda: settings.QDRANT_VECTOR_SIZE)
+    distance: Distance = Distance.COSINE
+    hnsw_m: int = field(default_factory=lambda: settings.QDRANT_HNSW_M)
+    hnsw_ef_construct: int = field(default_factory=lambda: settings.QDRANT_HNSW_EF_CONSTRUCT)
+    on_disk: bool = field(default_factory=lambda: settings.QDRANT_ON_DISK_VECTORS)
+    quantization: bool = field(default_factory=lambda: settings.QDRANT_QUANTIZATION)
+    quantile: float = 0.99
+    payload_indexes: Dict[str, PayloadSchemaType] = field(default_factory=dict)
+
+    def vectors_config(self) -> VectorParams:
+        return VectorParams(
+            size=self.vector_size,
+            distance=self.distance,
+            on_disk=self.on_disk
+        )
+
+    def hnsw_config(self) -> HnswConfigDiff:
+        return HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self) -> Optional[ScalarQuantization]:
+        if not self.quantization:
+            return None
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=self.quantile,
+                always_ram=True
+            )
+        )
+
+    def search_params(self) -> SearchParams:
+        """Query-time params: search quantized vectors, rescore with originals"""
+        quantization = None
+        if self.quantization:
+            quantization = QuantizationSearchParams(
+                rescore=True,
+                oversampling=settings.QDRANT_SEARCH_OVERSAMPLING
+            )
+        return SearchParams(hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF, quantization=quantization)
+
+
+def get_collection_profile(alias: str) -> CollectionProfile:
+    """Profile for the product or datasheet collection (defaults otherwise)"""
+    profiles = {
+        settings.QDRANT_PRODUCTS_COLLECTION: CollectionProfile(
+            payload_indexes={
+                "part_number": PayloadSchemaType.KEYWORD,
+                "category": PayloadSchemaType.KEYWORD,
+            }
+        ),
+        settings.QDRANT_PDF_COLLECTION: CollectionProfile(
+            payload_indexes={
+                "part_number": PayloadSchemaType.KEYWORD,
+                "part_numbers": PayloadSchemaType.KEYWORD,
+            }
+        ),
+    }
+    return profiles.get(alias, CollectionProfile())
+
+
+class VersionedCollection:
+    """
+    Manage `{alias}_v{n}` physical collections behind a stable alias.
+
+    Builds write into a fresh versioned collection while readers keep using
+    the alias. Once the build is validated the alias is swapped atomically
+    and old versions beyond `keep_versions` are deleted.
+    """
+
+    def __init__(self, client: QdrantClient, alias: str, keep_versions: Optional[int] = None):
+        self.client = client
+        self.alias = alias
+        self.keep_versions = settings.QDRANT_KEEP_VERSIONS if keep_versions is None else keep_versions
+        self._version_re = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+
+    def versions(self) -> List[Tuple[int, str]]:
+        """List (version, collection_name) pairs, oldest first"""
+        found = []
+        for collection in self.client.get_collections().collections:
+            match = self._version_re.match(collection.name)
+            if match:
+                found.append((int(match.group(1)), collection.name))
+        return sorted(found)
+
+    def live_collection(self) -> Optional[str]:
+        """Name of the collection the alias currently points to"""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.alias:
+                return alias.collection_name
+        return None
+
+    def _is_legacy_collection(self) -> bool:
+        """True if a real (non-alias) collection still uses the alias name"""
+        names = {c.name for c in self.client.get_collections().collections}
+        return self.alias in names
+
+    def create_build(self, profile: Optional[CollectionProfile] = None) -> str:
+        """Create the next versioned collection from a profile and return its name"""
+        profile = profile or get_collection_profile(self.alias)
+        versions = self.versions()
+        next_version = versions[-1][0] + 1 if versions else 1
+        name = f"{self.alias}_v{next_version}"
+
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=profile.vectors_config(),
+            hnsw_config=profile.hnsw_config(),
+            quantization_config=profile.quantization_config()
+        )
+        for field_name, schema in profile.payload_indexes.items():
+            self.client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema=schema
+            )
+        print(f"✅ Created build collection: {name} (alias '{self.alias}' -> {self.live_collection() or 'none'})")
+        return name
+
+    def live_count(self) -> Optional[int]:
+        """Points in the collection currently served under the alias (None if there is none)"""
+        live = self.live_collection() or (self.alias if self._is_legacy_collection() else None)
+        if not live:
+            return None
+        return self.client.get_collection(collection_name=live).points_count or 0
+
+    def validate(self, name: str, expected_points: int, errors: int = 0, sample_k: int = 10) -> bool:
+        """
+        Check a build before it goes live.
+
+        At most QDRANT_MAX_ERROR_RATIO of the attempted points may have
+        failed (`errors` out of `expected_points + errors`). The build must
+        not be empty, must hold at least `expected_points` vectors and at
+        least QDRANT_MIN_POINT_RATIO of the live collection,
+        and a stored vector must find its own point among the top `sample_k`
+        hits (identical texts share a vector, so a tie may rank another id
+        first; a near-1 score also passes).
+        """
+        attempted = expected_points + errors
+        if attempted and errors > attempted * settings.QDRANT_MAX_ERROR_RATIO:
+            print(f"  ✗ Validation failed: {errors} of {attempted} points failed "
+                  f"(maximum ratio {settings.QDRANT_MAX_ERROR_RATIO})")
+            return False
+
+        count = self.client.get_collection(collection_name=name).points_count or 0
+        if count == 0 or count < expected_points:
+            print(f"  ✗ Validation failed: {count} points in '{name}', expected {max(expected_points, 1)}")
+            return False
+
+        live_count = self.live_count()
+        if live_count and count < live_count * settings.QDRANT_MIN_POINT_RATIO:
+            print(f"  ✗ Validation failed: {count} points in '{name}' vs {live_count} live "
+                  f"(minimum ratio {settings.QDRANT_MIN_POINT_RATIO})")
+            return False
+
+        sample, _ = self.client.scroll(collection_name=name, limit=1, with_vectors=True)
+        if not sample or not sample[0].vector:
+            print(f"  ✗ Validation failed: could not read a sample vector from '{name}'")
+            return False
+
+        hits = self.client.search(
+            collection_name=name,
+            query_vector=sample[0].vector,
+            limit=sample_k
+        )
+        if not hits or (sample[0].id not in {hit.id for hit in hits} and hits[0].score < 0.999):
+            print(f"  ✗ Validation failed: sample query on '{name}' did not return its own point")
+            return False
+
+        return True
+
+    def publish(self, name: str):
+        """Atomically point the alias at `name`, then garbage-collect old versions"""
+        if self._is_legacy_collection():
+            # One-time migration: the pre-alias collection has to go before an
+            # alias can take its name. This is the only non-atomic step.
+            print(f"⚠️  Replacing legacy collection '{self.alias}' with an alias")
+            self.client.delete_collection(collection_name=self.alias)
+
+        operations = []
+        if self.live_collection():
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.alias)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=name, alias_name=self.alias)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        print(f"✅ Alias '{self.alias}' -> {name}")
+
+        self.garbage_collect()
+
+    def discard(self, name: str):
+        """Drop a build that failed validation; the live alias is untouched"""
+        self.client.delete_collection(collection_name=name)
+        print(f"🗑️  Discarded build collection: {name}")
+
+    def garbage_collect(self):
+        """Delete versions older than the live one beyond keep_versions"""
+        live = self.live_collection()
+        versions = self.versions()
+        live_version = next((v for v, name in versions if name == live), None)
+        if live_version is None:
+            return
+
+        older = [name for v, name in versions if v < live_version]
+        stale = older[:max(len(older) - self.keep_versions, 0)]
+        for name in stale:
+            self.client.delete_collection(collection_name=name)
+            print(f"🗑️  Removed old collection version: {name}")
@@ -3,15 +3,33 @@ Search Service Layer
 Unified search interface for Elasticsearch and Qdrant (Asynchronous)
 """
 from typing import List, Dict, Optional
+import asyncio
+import base64
+import hashlib
+import json
+import time
 from elasticsearch import AsyncElasticsearch
 from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Filter, FieldCondition, MatchValue
 import httpx
 import logging
 
 from .config import settings, get_es_url, get_qdrant_url
+from .qdrant_collections import get_collection_profile
+from .embeddings import prepare_embedding
+from .spec_normalizer import spec_range_clauses
+from .msearch import MSearchCoalescer
+from .product_graph import ProductGraphStore
 
 logger = logging.getLogger(__name__)
 
+class InvalidCursorError(ValueError):
+    """A paging cursor is malformed or was issued for another query"""
+
+
+# Filters semantic_search applies as Qdrant payload conditions
+QDRANT_FILTER_KEYS = ('category', 'part_number')
+
 class SearchService:
     """Unified asynchronous search service for products"""
     
@@ -20,11 +38,33 @@ class SearchService:
         # Note: QdrantClient has an async version but usually we use AsyncQdrantClient
         self.qdrant = AsyncQdrantClient(url=get_qdrant_url())
         self.ollama_url = settings.OLLAMA_HOST
+        self.products_profile = get_collection_profile(settings.QDRANT_PRODUCTS_COLLECTION)
+        # Concurrent searches from agents/requests share one _msearch round trip
+        self.msearch = MSearchCoalescer(self.es)
+        self.graph = ProductGraphStore()
+        # Unfiltered facet results for the current catalog generation
+        self._facet_cache: Dict[tuple, Dict] = {}
+        self._generation: Optional[str] = None
+        self._generation_checked = 0.0
     
-    async def text_search(self, query: str, size: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
-        """
-        Full-text search in Elasticsearch (Async)
-        """
+    def _build_text_query(self, query: Optional[str], filters: Optional[Dict] = None) -> Dict:
+        """Bool query shared by text search and facets (match_all when query is empty)"""
+        filter_clauses = []
+        if filters:
+            if 'category' in filters:
+                filter_clauses.append({"term": {"category.keyword": filters['category']}})
+            if 'brand' in filters:
+                filter_clauses.append({"term": {"brand": filters['brand']}})
+            if 'certificates' in filters:
+                filter_clauses.append({"term": {"certificates": filters['certificates']}})
+            if 'phased_out' in filters:
+                filter_clauses.append({"term": {"phased_out": filters['phased_out']}})
+            if filters.get('spec'):
+                filter_clauses.extend(spec_range_clauses(filters['spec']))
+        
+        if not query:
+            return {"bool": {"must": {"match_all": {}}, "filter": filter_clauses}}
+        
         # Build query - use should clauses for better part number matching
         should_clauses = [
             {
@@ -53,21 +93,25 @@ class SearchService:
             }
         ]
         
-        filter_clauses = []
-        if filters:
-            if 'category' in filters:
-                filter_clauses.append({"term": {"category.keyword": filters['category']}})
-            if 'phased_out' in filters:
-                filter_clauses.append({"term": {"phased_out": filters['phased_out']}})
+        return {
+            "bool": {
+                "should": should_clauses,
+                "filter": filter_clauses,
+                "minimum_should_match": 1
+            }
+        }
+    
+    async def text_search(self, query: str, size: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Full-text search in Elasticsearch (Async)
         
+        `filters` may hold `category`, `brand`, `certificates`, `phased_out`
+        and `spec`, a dict of
+        numeric spec constraints keyed by spec slug (see spec_range_clauses),
+        e.g. {"supply_voltage": {"covers": 24, "unit": "V"}}.
+        """
         es_query = {
-            "query": {
-                "bool": {
-                    "should": should_clauses,
-                    "filter": filter_clauses,
-                    "minimum_should_match": 1
-                }
-            },
+            "query": self._build_text_query(query, filters),
             "size": size,
             "highlight": {
                 "fields": {
@@ -78,27 +122,126 @@ class SearchService:
         }
         
         try:
-            result = await self.es.search(
-                index=settings.ES_PRODUCTS_INDEX,
-                body=es_query
-            )
+            result = await self.msearch.search(settings.ES_PRODUCTS_INDEX, es_query)
             
-            products = []
-            for hit in result['hits']['hits']:
-                product = hit['_source']
-                product['_score'] = hit['_score']
-                product['_highlights'] = hit.get('highlight', {})
-                products.append(product)
-            
-            return products
+            return [self._hit_to_product(hit) for hit in result['hits']['hits']]
             
         except Exception as e:
             logger.error(f"Elasticsearch search error: {e}")
             return []
     
-    async def semantic_search(self, query: str, limit: int = 10) -> List[Dict]:
+    def _hit_to_product(self, hit: Dict) -> Dict:
+        product = hit['_source']
+        product['_score'] = hit['_score']
+        product['_highlights'] = hit.get('highlight', {})
+        return product
+    
+    @staticmethod
+    def _query_fingerprint(query: Optional[str], filters: Optional[Dict]) -> str:
+        """Short hash binding a cursor to the query and filters it was issued for"""
+        payload = json.dumps({"query": query or "", "filters": filters or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def _encode_cursor(state: Dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict:
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursorError("Malformed cursor") from e
+        if not isinstance(state, dict) or not {"pit", "search_after", "query"} <= state.keys():
+            raise InvalidCursorError("Malformed cursor")
+        return state
+    
+    async def _close_pit(self, pit_id: Optional[str]):
+        if not pit_id:
+            return
+        try:
+            await self.es.close_point_in_time(id=pit_id)
+        except Exception as e:
+            # Unclosed PITs still expire after SEARCH_PIT_KEEP_ALIVE
+            logger.warning(f"Could not close point-in-time: {e}")
+    
+    async def text_search_page(self, query: str, size: int = 20, filters: Optional[Dict] = None,
+                               cursor: Optional[str] = None) -> Dict:
+        """
+        One page of full-text results with an opaque cursor for the next (Async)
+        
+        The first call opens a point-in-time so later pages see the same
+        catalog snapshot; pages continue with search_after on (score,
+        _shard_doc), so deep pages never use `from` offsets. Returns
+        {"results", "cursor", "has_more"}; `cursor` is None on the last page,
+        when the point-in-time is closed. A cursor only continues the query
+        and filters it was issued for; anything else raises InvalidCursorError.
+        """
+        fingerprint = self._query_fingerprint(query, filters)
+        if cursor:
+            state = self._decode_cursor(cursor)
+            if state['query'] != fingerprint:
+                raise InvalidCursorError("Cursor belongs to a different query or filters")
+        
+        pit_id = None
+        try:
+            if cursor:
+                pit_id = state['pit']
+            else:
+                pit = await self.es.open_point_in_time(
+                    index=settings.ES_PRODUCTS_INDEX,
+                    keep_alive=settings.SEARCH_PIT_KEEP_ALIVE
+                )
+                pit_id = pit['id']
+                state = {"search_after": None}
+            
+            body = {
+                "query": self._build_text_query(query, filters),
+                "size": size,
+                "sort": [{"_score": "desc"}, {"_shard_doc": "asc"}],
+                "pit": {"id": pit_id, "keep_alive": settings.SEARCH_PIT_KEEP_ALIVE},
+                "track_total_hits": False,
+                "highlight": {
+                    "fields": {
+                        "name": {},
+                        "description": {}
+                    }
+                }
+            }
+            if state['search_after']:
+                body["search_after"] = state['search_after']
+            
+            result = await self.es.search(body=body)
+            hits = result['hits']['hits']
+            pit_id = result.get('pit_id', pit_id)
+            
+            has_more = len(hits) == size
+            if not has_more:
+                await self._close_pit(pit_id)
+            
+            next_cursor = None
+            if has_more:
+                next_cursor = self._encode_cursor(
+                    {"pit": pit_id, "search_after": hits[-1]['sort'], "query": fingerprint}
+                )
+            return {
+                "results": [self._hit_to_product(hit) for hit in hits],
+                "cursor": next_cursor,
+                "has_more": has_more
+            }
+            
+        except Exception as e:
+            # Expired or invalid cursors end the listing rather than failing the page
+            logger.error(f"Elasticsearch paged search error: {e}")
+            await self._close_pit(pit_id)
+            return {"results": [], "cursor": None, "has_more": False}
+    
+    async def semantic_search(self, query: str, limit: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Vector similarity search in Qdrant (Async)
+        
+        `filters` may restrict results by exact `category` and/or
+        `part_number`; both are indexed payload fields in the collection.
         """
         try:
             async with httpx.AsyncClient() as client:
@@ -115,12 +258,24 @@ class SearchService:
                 logger.error(f"Ollama embedding failed: {response.text}")
                 return []
             
-            query_vector = response.json()['embedding']
+            # Must match the (possibly reduced) dimension of the collection
+            query_vector = prepare_embedding(response.json()['embedding'])
+            
+            query_filter = None
+            if filters:
+                conditions = [
+                    FieldCondition(key=key, match=MatchValue(value=filters[key]))
+                    for key in QDRANT_FILTER_KEYS if filters.get(key)
+                ]
+                if conditions:
+                    query_filter = Filter(must=conditions)
             
-            # Search Qdrant
+            # Search Qdrant through the alias so blue/green rebuilds are invisible
             results = await self.qdrant.search(
                 collection_name=settings.QDRANT_PRODUCTS_COLLECTION,
                 query_vector=query_vector,
+                query_filter=query_filter,
+                search_params=self.products_profile.search_params(),
                 limit=limit
             )
             
@@ -136,13 +291,44 @@ class SearchService:
             logger.error(f"Qdrant search error: {e}")
             return []
     
-    async def hybrid_search(self, query: str, size: int = 10) -> List[Dict]:
+    @staticmethod
+    def _es_only_filters(filters: Optional[Dict]) -> bool:
+        """Whether `filters` hold anything semantic_search cannot apply in Qdrant"""
+        return any(key not in QDRANT_FILTER_KEYS for key, value in (filters or {}).items() if value is not None)
+    
+    async def _matching_part_numbers(self, part_numbers: List[str], filters: Dict) -> set:
+        """The given part numbers whose products pass `filters` in Elasticsearch (Async)"""
+        query = self._build_text_query(None, filters)
+        query['bool']['filter'].append({"ids": {"values": part_numbers}})
+        try:
+            result = await self.msearch.search(
+                settings.ES_PRODUCTS_INDEX,
+                {"query": query, "size": len(part_numbers), "_source": ["part_number"]}
+            )
+        except Exception as e:
+            # Unverifiable hits are dropped rather than returned unfiltered
+            logger.error(f"Elasticsearch filter check error: {e}")
+            return set()
+        return {hit['_source'].get('part_number') for hit in result['hits']['hits']}
+    
+    async def hybrid_search(self, query: str, size: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Combine text and semantic search for best results (Async)
+        
+        Filters the Qdrant payload lacks (spec, brand, certificates,
+        phased_out) are checked in Elasticsearch: semantic hits are kept only
+        if their product passes them.
         """
-        # Get results from both
-        text_results = await self.text_search(query, size=size)
-        semantic_results = await self.semantic_search(query, limit=size)
+        # Get results from both concurrently
+        text_results, semantic_results = await asyncio.gather(
+            self.text_search(query, size=size, filters=filters),
+            self.semantic_search(query, limit=size, filters=filters)
+        )
+        if semantic_results and self._es_only_filters(filters):
+            allowed = await self._matching_part_numbers(
+                [p['part_number'] for p in semantic_results if p.get('part_number')], filters
+            )
+            semantic_results = [p for p in semantic_results if p.get('part_number') in allowed]
         
         merged = {}
         
@@ -176,16 +362,23 @@ class SearchService:
         return results[:size]
     
     async def get_product(self, part_number: str) -> Optional[Dict]:
-        """Get single product by part number (Async)"""
+        """Get single product by part number (Async, coalesced with other searches)"""
         try:
-            result = await self.es.get(
-                index=settings.ES_PRODUCTS_INDEX,
-                id=part_number
+            result = await self.msearch.search(
+                settings.ES_PRODUCTS_INDEX,
+                {"query": {"ids": {"values": [part_number]}}, "size": 1}
             )
-            return result['_source']
-        except:
+            hits = result['hits']['hits']
+            return hits[0]['_source'] if hits else None
+        except Exception as e:
+            logger.error(f"Elasticsearch get error: {e}")
             return None
     
+    async def get_products(self, part_numbers: List[str]) -> Dict[str, Optional[Dict]]:
+        """Look up several products at once; the lookups share one _msearch (Async)"""
+        products = await asyncio.gather(*(self.get_product(pn) for pn in part_numbers))
+        return dict(zip(part_numbers, products))
+    
     async def get_similar_products(self, part_number: str, limit: int = 5) -> List[Dict]:
         """Find similar products based on a given product (Async)"""
         product = await self.get_product(part_number)
@@ -197,31 +390,131 @@ class SearchService:
         
         return [r for r in results if r.get('part_number') != part_number][:limit]
     
-    async def get_categories(self) -> List[str]:
-        """Get all unique product categories (Async)"""
+    async def get_substitution(self, part_number: str, with_products: bool = True) -> Dict:
+        """
+        Successor lookup from the product graph (Async)
+        
+        Returns whether the part is phased out, its successor chain and the
+        newest replacement; with `with_products`, the replacement's product
+        document is fetched as well.
+        """
+        graph = await asyncio.to_thread(self.graph.get)  # May reload the file
+        chain = graph.successor_chain(part_number)
+        result = {
+            "part_number": part_number,
+            "known": part_number in graph,
+            "phased_out": part_number in graph.phased_out,
+            "successor_chain": [{"part_number": pn, "name": graph.names.get(pn, "")} for pn in chain],
+            "replacement": chain[-1] if chain else None,
+        }
+        if with_products and chain:
+            result["replacement_product"] = await self.get_product(chain[-1])
+        return result
+    
+    async def get_accessories(self, part_number: str, with_products: bool = False) -> List[Dict]:
+        """Accessories of a part (or of its replacement) from the product graph (Async)"""
+        graph = await asyncio.to_thread(self.graph.get)  # May reload the file
+        accessories = [
+            {"part_number": pn, "name": graph.names.get(pn, "")}
+            for pn in graph.accessories_for(part_number)
+        ]
+        if with_products and accessories:
+            products = await self.get_products([a['part_number'] for a in accessories])
+            for accessory in accessories:
+                accessory['product'] = products.get(accessory['part_number'])
+        return accessories
+    
+    async def _catalog_generation(self) -> Optional[str]:
+        """
+        Identify the live catalog: the index behind the alias plus the
+        generation stamped by the last ingest. Checked at most every
+        FACET_GENERATION_TTL seconds.
+        """
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_checked > settings.FACET_GENERATION_TTL:
+            mappings = await self.es.indices.get_mapping(index=settings.ES_PRODUCTS_INDEX)
+            index_name, mapping = next(iter(mappings.items()))
+            generation = mapping['mappings'].get('_meta', {}).get('catalog_generation', '')
+            self._generation = f"{index_name}:{generation}"
+            self._generation_checked = now
+        return self._generation
+    
+    def _facet_aggs(self, names: List[str]) -> Dict:
+        aggs = {}
+        for name in names:
+            facet = settings.SEARCH_FACETS[name]
+            if facet.get('type', 'terms') == 'spec':
+                field = f"spec_num.{facet['spec']}"
+                aggs[f"{name}__min"] = {"min": {"field": f"{field}.min"}}
+                aggs[f"{name}__max"] = {"max": {"field": f"{field}.max"}}
+                aggs[f"{name}__unit"] = {"terms": {"field": f"{field}.unit", "size": 1}}
+            else:
+                aggs[name] = {"terms": {"field": facet['field'], "size": facet.get('size', 20)}}
+        return aggs
+    
+    def _parse_facets(self, names: List[str], aggregations: Dict) -> Dict:
+        facets = {}
+        for name in names:
+            if settings.SEARCH_FACETS[name].get('type', 'terms') == 'spec':
+                units = aggregations[f"{name}__unit"]['buckets']
+                facets[name] = {
+                    "min": aggregations[f"{name}__min"]['value'],
+                    "max": aggregations[f"{name}__max"]['value'],
+                    "unit": units[0]['key'] if units else None
+                }
+            else:
+                facets[name] = [
+                    {"value": b.get('key_as_string', b['key']), "count": b['doc_count']}
+                    for b in aggregations[name]['buckets']
+                ]
+        return facets
+    
+    async def facets(self, query: Optional[str] = None, filters: Optional[Dict] = None,
+                     names: Optional[List[str]] = None) -> Dict:
+        """
+        Facet counts for products matching `query` and `filters` (Async)
+        
+        Facets are declared in settings.SEARCH_FACETS. Terms facets return
+        [{"value", "count"}]; spec facets return {"min", "max", "unit"}.
+        Results without a query or filters (category browsing) are cached
+        until the catalog generation changes.
+        """
+        names = [n for n in (names or settings.SEARCH_FACETS) if n in settings.SEARCH_FACETS]
+        cacheable = not query and not filters
+        
         try:
-            result = await self.es.search(
-                index=settings.ES_PRODUCTS_INDEX,
-                body={
+            if cacheable:
+                key = (await self._catalog_generation(), tuple(names))
+                if key in self._facet_cache:
+                    return self._facet_cache[key]
+            
+            result = await self.msearch.search(
+                settings.ES_PRODUCTS_INDEX,
+                {
                     "size": 0,
-                    "aggs": {
-                        "categories": {
-                            "terms": {
-                                "field": "category.keyword",
-                                "size": 100
-                            }
-                        }
-                    }
+                    "query": self._build_text_query(query, filters),
+                    "aggs": self._facet_aggs(names)
                 }
             )
+            facets = self._parse_facets(names, result['aggregations'])
             
-            buckets = result['aggregations']['categories']['buckets']
-            return [b['key'] for b in buckets]
+            if cacheable:
+                # Only the current generation is worth keeping
+                self._facet_cache = {k: v for k, v in self._facet_cache.items() if k[0] == key[0]}
+                self._facet_cache[key] = facets
+            return facets
             
-        except:
-            return []
+        except Exception as e:
+            logger.error(f"Elasticsearch facet error: {e}")
+            return {}
+    
+    async def get_categories(self) -> List[str]:
+        """Get all unique product categories (Async, cached per catalog generation)"""
+        facets = await self.facets(names=["category"])
+        return [bucket['value'] for bucket in facets.get('category', [])]
 
     async def close(self):
         """Cleanly close connections"""
+        await self.msearch.close()
         await self.es.close()
         # Qdrant client close if needed
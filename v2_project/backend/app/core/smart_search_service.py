@@ -8,6 +8,7 @@ import httpx
 from typing import List, Dict, Optional
 from .config import settings
 from .search_service import SearchService
+from .spec_normalizer import requirements_to_spec_filters
 
 logger = logging.getLogger(__name__)
 
@@ -79,7 +80,15 @@ class SmartSearchService:
             if len(query.split()) < 3 and last_msg:
                  search_query = f"{last_msg} {query}"
 
-        results = await self.search_service.hybrid_search(search_query, size=10)
+        # Numeric requirements become range filters on the normalized spec index
+        spec_filters = requirements_to_spec_filters(analysis.get('requirements'))
+        results = []
+        if spec_filters:
+            results = await self.search_service.hybrid_search(
+                search_query, size=10, filters={"spec": spec_filters}
+            )
+        if not results:
+            results = await self.search_service.hybrid_search(search_query, size=10)
         
         # 3. Handle Ambiguity (Hybrid Mode)
         # We still perform a search even if ambiguous to show preliminary results
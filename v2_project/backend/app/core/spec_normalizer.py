@@ -0,0 +1,191 @@
+"""
+Specification Normalizer
+Parse scraped spec strings ("10 ... 32 V", "≤ 600 kHz", "1,024") into numeric
+min/max values with a canonical unit, indexed under `spec_num.<slug>`
+"""
+import re
+from typing import Dict, List, Optional
+
+# unit as written -> (canonical unit, factor to canonical)
+UNITS = {
+    "µm": ("mm", 0.001), "mm": ("mm", 1.0), "cm": ("mm", 10.0), "m": ("mm", 1000.0),
+    "µs": ("ms", 0.001), "ms": ("ms", 1.0), "s": ("ms", 1000.0),
+    "Hz": ("Hz", 1.0), "kHz": ("Hz", 1e3), "MHz": ("Hz", 1e6),
+    "mV": ("V", 0.001), "V": ("V", 1.0), "kV": ("V", 1e3),
+    "µA": ("mA", 0.001), "mA": ("mA", 1.0), "A": ("mA", 1e3),
+    "mW": ("W", 0.001), "W": ("W", 1.0), "kW": ("W", 1e3),
+    "Ncm": ("Nm", 0.01), "Nm": ("Nm", 1.0),
+    "kg": ("kg", 1.0), "Kilograms": ("kg", 1.0),
+    "min⁻¹": ("rpm", 1.0), "rpm": ("rpm", 1.0),
+    "kbit/s": ("kbit/s", 1.0), "Mbit/s": ("kbit/s", 1e3),
+    "gcm²": ("gcm²", 1.0), "rad/s²": ("rad/s²", 1.0),
+    "°C": ("°C", 1.0), "°": ("°", 1.0), "%": ("%", 1.0), "bar": ("bar", 1.0),
+    "lx": ("lx", 1.0), "years": ("years", 1.0), "g": ("g", 1.0),
+}
+
+# Classification codes look numeric but are identifiers
+EXCLUDED_KEYS = re.compile(r"^(ECLASS|ETIM|UNSPSC|EAN|GTIN)\b", re.IGNORECASE)
+
+_NUMBER = r"[-+]?\s?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:\s?[x×]\s?10\^-?\d+)?"
+_UNIT = "|".join(re.escape(u) for u in sorted(UNITS, key=len, reverse=True))
+
+
+def _quantity(name: str) -> str:
+    return rf"(?P<{name}>{_NUMBER})\s?(?P<{name}_unit>{_UNIT})?"
+
+
+# Current type or word after the unit ("10 V DC ... 30 V DC"), then a footnote marker
+_QUALIFIER = r"(?:\s?(?:AC/DC|[A-Za-z]+\.?))?(?:\s?\d\))?"
+
+# Leading quantity, optional range end; scraped text may run straight into a capitalized note
+_VALUE_RE = re.compile(
+    rf"^(?P<op>[≤≥±]|[<>]=?)?\s?{_quantity('lo')}"
+    rf"(?:{_QUALIFIER}\s?(?:\.\.\.|…|\bto\b)\s?{_quantity('hi')})?"
+    rf"(?=$|[\s,;(]|[A-Z])"
+)
+_FOOTNOTE_RE = re.compile(r"\s\d\)")
+# Formula symbol after a spec name ("Supply voltage UB", "Output current IA")
+_SYMBOL_SUFFIX_RE = re.compile(r"(?<=\w)\s+[A-Z][A-Za-z0-9]?$")
+
+
+def slugify_spec_key(key: str) -> str:
+    """'Electronics > Supply voltage UB' -> 'supply_voltage'"""
+    name = _SYMBOL_SUFFIX_RE.sub("", key.split(">")[-1].strip())
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _to_number(text: str) -> float:
+    """'1,024' -> 1024.0, '3.6 x 10^10' -> 3.6e10"""
+    parts = re.split(r"[x×]10\^", re.sub(r"[\s,]", "", text), maxsplit=1)
+    value = float(parts[0])
+    return value * 10 ** int(parts[1]) if len(parts) > 1 else value
+
+
+def _canonical(value: Optional[float], unit: Optional[str]):
+    if value is None or unit is None:
+        return value, unit
+    canonical_unit, factor = UNITS[unit]
+    return value * factor, canonical_unit
+
+
+def parse_spec_value(value: str) -> Optional[Dict]:
+    """
+    Parse a spec value into {"min", "max", "unit"}.
+
+    A single quantity sets min and max; "a ... b" is a range; ≤/≥ leave the
+    other bound open (None); ± gives a symmetric range. Only the leading
+    quantity is read, so trailing qualifiers like "(+20 °C)" are ignored.
+    Returns None for values that don't start with a number.
+    """
+    if not isinstance(value, str):
+        return None
+    text = value.replace("\xa0", " ").replace("–", "-").replace("−", "-")
+    text = _FOOTNOTE_RE.sub("", text).strip()
+
+    match = _VALUE_RE.match(text)
+    if not match:
+        return None
+
+    lo = _to_number(match.group("lo"))
+    unit = match.group("lo_unit") or match.group("hi_unit")
+    hi = _to_number(match.group("hi")) if match.group("hi") else lo
+
+    op = match.group("op")
+    if op in ("≤", "<", "<="):
+        lo = None
+    elif op in ("≥", ">", ">="):
+        hi = None
+    elif op == "±":
+        lo, hi = -abs(lo), abs(lo)
+
+    lo, _ = _canonical(lo, match.group("lo_unit") or unit)
+    hi, _ = _canonical(hi, match.group("hi_unit") or unit)
+    if lo is not None and hi is not None and lo > hi:
+        lo, hi = hi, lo
+    return {"min": lo, "max": hi, "unit": UNITS[unit][0] if unit else None}
+
+
+def normalize_specifications(specifications: Optional[Dict]) -> Dict[str, Dict]:
+    """Build the `spec_num` object for a product (first value wins per slug)"""
+    spec_num = {}
+    for key, value in (specifications or {}).items():
+        name = key.split(">")[-1].strip()
+        if EXCLUDED_KEYS.match(name):
+            continue
+        slug = slugify_spec_key(key)
+        if not slug or slug in spec_num:
+            continue
+        parsed = parse_spec_value(value)
+        if parsed:
+            spec_num[slug] = {k: v for k, v in parsed.items() if v is not None}
+    return spec_num
+
+
+# Mapping fragments for product indices
+SPEC_NUM_MAPPING = {"type": "object"}
+SPEC_NUM_DYNAMIC_TEMPLATES = [
+    {"spec_num_min": {"path_match": "spec_num.*.min", "mapping": {"type": "double"}}},
+    {"spec_num_max": {"path_match": "spec_num.*.max", "mapping": {"type": "double"}}},
+    {"spec_num_unit": {"path_match": "spec_num.*.unit", "mapping": {"type": "keyword"}}},
+]
+
+
+def spec_range_clauses(spec_filters: Dict[str, Dict]) -> List[Dict]:
+    """
+    Turn spec filters into Elasticsearch filter clauses.
+
+    Each filter is keyed by spec slug and may contain:
+      - "min" / "max": an ES range body ({"gte": .., "lte": ..}) on that bound
+      - "covers": a number or [low, high] the product's range must include
+        (an open lower bound counts as covering)
+      - "unit": unit of the numbers above; converted to the canonical unit
+    """
+    clauses = []
+    for slug, spec in spec_filters.items():
+        field = f"spec_num.{slugify_spec_key(slug)}"
+        unit = spec.get("unit")
+        factor = UNITS[unit][1] if unit in UNITS else 1.0
+
+        def scaled(bounds: Dict) -> Dict:
+            return {op: value * factor for op, value in bounds.items()}
+
+        if unit:
+            clauses.append({"term": {f"{field}.unit": UNITS[unit][0] if unit in UNITS else unit}})
+        for bound in ("min", "max"):
+            if spec.get(bound):
+                clauses.append({"range": {f"{field}.{bound}": scaled(spec[bound])}})
+
+        covers = spec.get("covers")
+        if covers is not None:
+            low, high = covers if isinstance(covers, (list, tuple)) else (covers, covers)
+            clauses.append({"range": {f"{field}.max": {"gte": high * factor}}})
+            clauses.append({"bool": {"should": [
+                {"range": {f"{field}.min": {"lte": low * factor}}},
+                {"bool": {"must_not": {"exists": {"field": f"{field}.min"}}}}
+            ], "minimum_should_match": 1}})
+    return clauses
+
+
+def requirements_to_spec_filters(requirements: Optional[Dict]) -> Dict[str, Dict]:
+    """
+    Map LLM-extracted requirements ({"supply voltage": "24 V", ...}) to spec
+    filters. Values that don't parse as quantities are left to text search.
+    """
+    filters = {}
+    if not isinstance(requirements, dict):
+        return filters
+    for key, value in requirements.items():
+        parsed = parse_spec_value(str(value)) if value is not None else None
+        slug = slugify_spec_key(str(key))
+        if not parsed or not slug:
+            continue
+
+        spec = {"unit": parsed["unit"]} if parsed["unit"] else {}
+        if parsed["min"] is None:
+            spec["max"] = {"lte": parsed["max"]}
+        elif parsed["max"] is None:
+            spec["max"] = {"gte": parsed["min"]}
+        else:
+            spec["covers"] = [parsed["min"], parsed["max"]]
+        filters[slug] = spec
+    return filters
@@ -1,15 +1,25 @@
-from fastapi import FastAPI, HTTPException, Body
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Body, Header
+from pydantic import BaseModel, Field
 import os
+import secrets
 import uvicorn
 from contextlib import asynccontextmanager
+from typing import Dict, Optional
 from .haystack_pipeline import HaystackPipeline
+from .core.config import settings
+from .core.loop_monitor import loop_monitor
+from .core.search_service import InvalidCursorError, SearchService
 
 # Initialize Pipeline
 pipeline = HaystackPipeline()
+search_service = SearchService()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 0. Opt-in event loop monitor (LOOP_MONITOR_ENABLED)
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    
     # 1. Load initial dummy data
     pipeline.index_data([
         {"content": "Al Sakr Online is an industrial marketplace for SICK sensors.", "meta": {"source": "manual"}},
@@ -23,12 +33,20 @@ async def lifespan(app: FastAPI):
     
     yield
     print("Shutting down...")
+    await search_service.close()
+    await loop_monitor.stop()
 
 app = FastAPI(title="Al Sakr V3 API - Haystack Edition", lifespan=lifespan)
 
 class QueryRequest(BaseModel):
     query: str
 
+class ProductSearchRequest(BaseModel):
+    query: str = ""
+    size: int = Field(20, ge=1, le=100)
+    filters: Optional[Dict] = None
+    cursor: Optional[str] = None  # From the previous page; same query and filters required
+
 @app.get("/")
 def read_root():
     return {"status": "online", "engine": "Haystack + Ollama", "erp_status": "disconnected"}
@@ -38,9 +56,31 @@ def chat(request: QueryRequest):
     response = pipeline.query(request.query)
     return {"response": response}
 
+@app.post("/api/products/search")
+async def search_products(request: ProductSearchRequest):
+    """Full-text product search, paged with a point-in-time cursor"""
+    try:
+        return await search_service.text_search_page(
+            request.query, size=request.size, filters=request.filters, cursor=request.cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/health")
 def health():
     return {"status": "healthy"}
 
+@app.get("/api/admin/loop-stats")
+async def loop_stats(x_admin_token: Optional[str] = Header(None)):
+    """Event loop lag and recent blocking stacks (LOOP_MONITOR_ENABLED must be set)"""
+    # Stacks expose internals: closed unless a token is configured
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled (ADMIN_API_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if not settings.LOOP_MONITOR_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **loop_monitor.snapshot()}
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+from app.core.bulk_indexer import chunk_ops, op_size, serialize_action
+
+
+def test_serialize_index_and_delete_actions():
+    action, source = serialize_action({"_index": "products", "_id": "1", "_source": {"name": "Sensor"}})
+    assert json.loads(action) == {"index": {"_index": "products", "_id": "1"}}
+    assert source == b'{"name":"Sensor"}'
+
+    action, source = serialize_action({"_op_type": "delete", "_index": "products", "_id": "1"})
+    assert json.loads(action) == {"delete": {"_index": "products", "_id": "1"}}
+    assert source is None
+
+
+def test_op_size_counts_newlines():
+    assert op_size((b"abc", b"de")) == 3 + 1 + 2 + 1
+    assert op_size((b"abc", None)) == 4
+
+
+def test_chunks_bounded_by_count():
+    ops = [(b"a", b"b")] * 5
+    assert [len(c) for c in chunk_ops(ops, chunk_size=2, max_chunk_bytes=1000)] == [2, 2, 1]
+
+
+def test_chunks_bounded_by_bytes():
+    ops = [(b"x" * 9, None)] * 5  # 10 bytes each
+    chunks = list(chunk_ops(ops, chunk_size=100, max_chunk_bytes=25))
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert all(sum(op_size(op) for op in c) <= 25 for c in chunks)
+
+
+def test_oversized_op_gets_its_own_chunk():
+    small, big = (b"x" * 9, None), (b"x" * 99, None)
+    chunks = list(chunk_ops([small, big, small], chunk_size=100, max_chunk_bytes=25))
+    assert chunks == [[small], [big], [small]]
@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.core.catalog_snapshot import iter_snapshot_records, normalize_record, to_catalog_record, write_snapshot
+
+
+def test_normalize_csv_row():
+    row = normalize_record({
+        "part_number": " 1000001 ",
+        "name": "N/A",
+        "phased_out": "Yes",
+        "specifications": '{"Supply voltage": "10 V ... 30 V", "Weight": "N/A"}',
+        "image_urls": "a.jpg| b.jpg |",
+    })
+
+    assert row["part_number"] == "1000001"
+    assert row["name"] is None
+    assert row["phased_out"] is True
+    assert row["specifications"] == [("Supply voltage", "10 V ... 30 V")]
+    assert row["image_urls"] == ["a.jpg", "b.jpg"]
+
+
+def test_normalize_json_row():
+    row = normalize_record({
+        "part_number": 1000001,
+        "phased_out": False,
+        "specifications": {"Weight": "0.1 kg"},
+        "image_urls": ["a.jpg", None, ""],
+        "description": float("nan"),
+    })
+
+    assert row["part_number"] == "1000001"
+    assert row["phased_out"] is False
+    assert row["specifications"] == [("Weight", "0.1 kg")]
+    assert row["image_urls"] == ["a.jpg"]
+    assert row["description"] is None
+
+
+def test_normalize_missing_and_invalid_values():
+    row = normalize_record({"specifications": "{not json"})
+    assert row["specifications"] == []
+    assert row["phased_out"] is False
+    assert row["image_urls"] == []
+
+
+def test_csv_and_json_rows_build_the_same_record():
+    csv_row = {"part_number": "1000001", "phased_out": "No", "specifications": '{"Weight": "0.1 kg"}',
+               "image_urls": "a.jpg|b.jpg"}
+    json_row = {"part_number": "1000001", "phased_out": False, "specifications": {"Weight": "0.1 kg"},
+                "image_urls": ["a.jpg", "b.jpg"]}
+    assert to_catalog_record(csv_row) == to_catalog_record(json_row)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.parquet")
+    rows = [{"part_number": str(n), "phased_out": "Yes", "specifications": {"Weight": f"{n} kg"}} for n in range(3)]
+
+    assert write_snapshot(rows, path) == 3
+    records = list(iter_snapshot_records(path))
+
+    assert [to_catalog_record(r) for r in records] == [to_catalog_record(r) for r in rows]
@@ -0,0 +1,69 @@
+from app.core.datasheet_chunker import DatasheetChunker, find_repeated_lines, render_table
+
+SECTIONS = ["Features", "Mechanics", "Electronics", "Ambient data", "Ordering"]
+
+
+def make_pages(count):
+    return [
+        {
+            "number": n,
+            "text": (f"SICK AG | Datasheet WTB4\n{SECTIONS[n - 1]}\n\n"
+                     f"The {SECTIONS[n - 1].lower()} section describes the sensor.\n"
+                     f"Details follow for {SECTIONS[n - 1].lower()}.\n"
+                     f"Page {n} of {count}"),
+            "tables": [],
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def test_repeated_headers_and_footers_are_removed():
+    chunks = DatasheetChunker(chunk_size=1000, overlap=0).chunk_pages(make_pages(4))
+    text = "\n".join(c["text"] for c in chunks)
+
+    assert "SICK AG" not in text
+    assert "Page" not in text
+    for section in SECTIONS[:4]:
+        assert section in text
+        assert f"The {section.lower()} section describes the sensor." in text
+
+
+def test_boilerplate_needs_enough_pages():
+    assert find_repeated_lines(make_pages(2)) == set()
+
+
+def test_text_chunks_respect_size_and_track_pages():
+    chunker = DatasheetChunker(chunk_size=60, overlap=20)
+    chunks = chunker.chunk_pages(make_pages(4))
+
+    assert len(chunks) > 1
+    assert all(len(c["text"]) <= 60 for c in chunks)
+    assert chunks[0]["page_start"] == 1
+    assert chunks[-1]["page_end"] == 4
+    assert all(c["chunk_type"] == "text" for c in chunks)
+
+
+def test_long_lines_split_at_words():
+    page = {"number": 1, "text": " ".join(f"word{n}" for n in range(100)), "tables": []}
+    chunks = DatasheetChunker(chunk_size=50, overlap=0).chunk_pages([page])
+
+    words = [w for c in chunks for w in c["text"].split()]
+    assert words == [f"word{n}" for n in range(100)]
+
+
+def test_large_tables_repeat_the_header():
+    rows = [["Parameter", "Value"]] + [[f"Spec {n}", f"{n} mm"] for n in range(20)]
+    chunks = DatasheetChunker(chunk_size=60, overlap=0).table_chunks(rows, page_number=3)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk["text"].splitlines()[0] == "Parameter | Value"
+        assert chunk["chunk_type"] == "table"
+        assert chunk["page_start"] == chunk["page_end"] == 3
+    body = [line for c in chunks for line in c["text"].splitlines()[1:]]
+    assert body == [f"Spec {n} | {n} mm" for n in range(20)]
+
+
+def test_render_table_drops_empty_rows_and_collapses_whitespace():
+    rows = [["Supply", " 10 V\n... 30 V "], [None, ""], ["Output", None]]
+    assert render_table(rows) == ["Supply | 10 V ... 30 V", "Output | "]
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("elasticsearch")
+pytest.importorskip("qdrant_client")
+
+from app.core.datasheet_retrieval import query_terms, reciprocal_rank_fusion
+
+
+def chunks(*ids):
+    return [{"chunk_id": chunk_id, "text": f"text {chunk_id}"} for chunk_id in ids]
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([chunks("a", "b", "c"), chunks("b", "d", "a")], k=60)
+
+    assert [c["chunk_id"] for c in fused][:2] == ["b", "a"]
+    assert fused[0]["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert {c["chunk_id"] for c in fused} == {"a", "b", "c", "d"}
+
+
+def test_rrf_single_ranking_keeps_order():
+    fused = reciprocal_rank_fusion([chunks("a", "b", "c")], k=60)
+    assert [c["chunk_id"] for c in fused] == ["a", "b", "c"]
+    assert fused[2]["rrf_score"] == pytest.approx(1 / 63)
+
+
+def test_rrf_keeps_first_seen_fields():
+    first = [{"chunk_id": "a", "text": "bm25", "score": 7.0}]
+    second = [{"chunk_id": "a", "text": "vector", "score": 0.8}]
+    fused = reciprocal_rank_fusion([first, second], k=60)
+    assert fused == [{"chunk_id": "a", "text": "bm25", "score": 7.0, "rrf_score": pytest.approx(2 / 61)}]
+
+
+def test_rrf_empty():
+    assert reciprocal_rank_fusion([[], []], k=60) == []
+
+
+def test_query_terms_drop_stopwords_and_duplicates():
+    assert query_terms("What is the supply voltage of the WTB4-3P2161? Supply 10,5 V") == [
+        "supply", "voltage", "wtb4-3p2161", "10,5", "v"]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+from app.core.msearch import MSearchCoalescer, MSearchItemError
+
+
+class FakeES:
+    """Echoes each search body back; bodies with "fail" get a per-item error"""
+
+    def __init__(self, msearch_error=None):
+        self.msearch_error = msearch_error
+        self.searches = []
+        self.msearches = []
+
+    async def search(self, index, body):
+        self.searches.append(body)
+        return {"hits": {"hits": [body]}}
+
+    async def msearch(self, searches):
+        self.msearches.append(searches)
+        if self.msearch_error:
+            raise self.msearch_error
+        responses = []
+        for body in searches[1::2]:
+            if body.get("fail"):
+                responses.append({"status": 400, "error": {"type": "search_phase_execution_exception"}})
+            else:
+                responses.append({"hits": {"hits": [body]}})
+        return {"responses": responses}
+
+
+def run_searches(coalescer, bodies):
+    async def go():
+        try:
+            return await asyncio.gather(*(coalescer.search("products", b) for b in bodies),
+                                        return_exceptions=True)
+        finally:
+            await coalescer.close()
+    return asyncio.run(go())
+
+
+def test_concurrent_searches_share_one_msearch():
+    es = FakeES()
+    results = run_searches(MSearchCoalescer(es, window_ms=5, max_batch=10), [{"n": n} for n in range(3)])
+
+    assert [r["hits"]["hits"][0]["n"] for r in results] == [0, 1, 2]
+    assert len(es.msearches) == 1
+    assert es.searches == []
+
+
+def test_failed_item_only_fails_its_caller():
+    es = FakeES()
+    results = run_searches(MSearchCoalescer(es, window_ms=5, max_batch=10),
+                           [{"n": 0}, {"n": 1, "fail": True}, {"n": 2}])
+
+    assert results[0]["hits"]["hits"][0]["n"] == 0
+    assert isinstance(results[1], MSearchItemError)
+    assert results[1].status == 400
+    assert results[2]["hits"]["hits"][0]["n"] == 2
+
+
+def test_failed_msearch_fails_every_caller():
+    es = FakeES(msearch_error=ConnectionError("down"))
+    results = run_searches(MSearchCoalescer(es, window_ms=5, max_batch=10), [{"n": 0}, {"n": 1}])
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+
+def test_lone_search_is_sent_as_plain_search():
+    es = FakeES()
+    run_searches(MSearchCoalescer(es, window_ms=5, max_batch=10), [{"n": 0}])
+    assert es.searches == [{"n": 0}]
+    assert es.msearches == []
+
+
+def test_max_batch_splits_requests():
+    es = FakeES()
+    run_searches(MSearchCoalescer(es, window_ms=5, max_batch=2), [{"n": n} for n in range(4)])
+    assert [len(m) // 2 for m in es.msearches] == [2, 2]
+
+
+def test_zero_window_disables_coalescing():
+    es = FakeES()
+    run_searches(MSearchCoalescer(es, window_ms=0), [{"n": n} for n in range(3)])
+    assert len(es.searches) == 3
+    assert es.msearches == []
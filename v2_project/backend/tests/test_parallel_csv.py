@@ -0,0 +1,58 @@
+import csv
+
+from app.core.parallel_csv import read_csv_range, read_header, split_csv_ranges
+
+ROWS = [
+    {"part_number": "1000001", "description": "Line one\nline two\nline three"},
+    {"part_number": "1000002", "description": 'Says "hello"\nacross lines'},
+    {"part_number": "1000003", "description": "Plain"},
+    {"part_number": "1000004", "description": "Another\n\nmultiline, with comma"},
+    {"part_number": "1000005", "description": "Last"},
+]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["part_number", "description"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_all(path, ranges):
+    fieldnames, _ = read_header(path)
+    return [row for byte_range in ranges for row in read_csv_range(path, fieldnames, byte_range)]
+
+
+def test_read_header(tmp_path):
+    path = write_csv(tmp_path / "products.csv", ROWS)
+    fieldnames, offset = read_header(path)
+    assert fieldnames == ["part_number", "description"]
+    assert offset == len("part_number,description\r\n")
+
+
+def test_ranges_cover_file_without_gaps(tmp_path):
+    path = write_csv(tmp_path / "products.csv", ROWS)
+    ranges = split_csv_ranges(path, 1)
+
+    _, data_start = read_header(path)
+    assert ranges[0][0] == data_start
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(ranges, ranges[1:]))
+    assert ranges[-1][1] == (tmp_path / "products.csv").stat().st_size
+
+
+def test_ranges_never_cut_inside_quoted_fields(tmp_path):
+    path = write_csv(tmp_path / "products.csv", ROWS)
+
+    # The smallest target forces a cut after every line that ends a record
+    ranges = split_csv_ranges(path, 1)
+
+    assert len(ranges) == len(ROWS)
+    assert read_all(path, ranges) == ROWS
+
+
+def test_one_range_when_target_exceeds_file(tmp_path):
+    path = write_csv(tmp_path / "products.csv", ROWS)
+    ranges = split_csv_ranges(path, 1 << 20)
+    assert len(ranges) == 1
+    assert read_all(path, ranges) == ROWS
@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+from app.core.config import settings
+from app.core.product_delta import DeltaPlanner, compute_content_hash
+
+
+def index_action(doc_id, content_hash):
+    return {"_index": "products", "_id": doc_id, "_source": {"content_hash": content_hash}}
+
+
+@pytest.fixture
+def existing():
+    return {str(n): f"hash-{n}" for n in range(10)}
+
+
+def test_content_hash_ignores_volatile_fields():
+    doc = {"part_number": "1000001", "name": "Sensor"}
+    assert compute_content_hash(doc) == compute_content_hash({**doc, "indexed_at": "2024-01-01", "content_hash": "x"})
+    assert compute_content_hash(doc) != compute_content_hash({**doc, "name": "Encoder"})
+
+
+def test_filter_changed_skips_unchanged(existing):
+    planner = DeltaPlanner(existing)
+    actions = [index_action("0", "hash-0"), index_action("1", "changed"), index_action("new", "hash-new")]
+
+    sent = [a["_id"] for a in planner.filter_changed(actions)]
+
+    assert sent == ["1", "new"]
+    assert planner.stats == {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 0}
+
+
+def test_deletes_products_missing_from_source(existing, monkeypatch):
+    monkeypatch.setattr(settings, "ES_MIN_DOC_RATIO", 0.9)
+    planner = DeltaPlanner(existing)
+    list(planner.filter_changed(index_action(str(n), f"hash-{n}") for n in range(9)))
+
+    deletes = list(planner.delete_actions("products"))
+
+    assert deletes == [{"_op_type": "delete", "_index": "products", "_id": "9"}]
+    assert planner.stats["deleted"] == 1
+
+
+def test_skips_deletes_below_min_doc_ratio(existing, monkeypatch):
+    monkeypatch.setattr(settings, "ES_MIN_DOC_RATIO", 0.9)
+    planner = DeltaPlanner(existing)
+    list(planner.filter_changed(index_action(str(n), f"hash-{n}") for n in range(8)))
+
+    assert list(planner.delete_actions("products")) == []
+    assert planner.stats["deleted"] == 0
+
+
+def test_skips_deletes_after_source_errors(existing):
+    planner = DeltaPlanner(existing)
+    list(planner.filter_changed(index_action(str(n), f"hash-{n}") for n in range(9)))
+
+    assert list(planner.delete_actions("products", source_errors=1)) == []
+
+
+def test_merge_counts_seen_ids_from_workers(existing):
+    planner = DeltaPlanner(existing)
+    worker = DeltaPlanner(existing)
+    list(worker.filter_changed(index_action(str(n), f"hash-{n}") for n in range(10)))
+
+    planner.merge(worker.seen, worker.stats)
+
+    assert list(planner.delete_actions("products")) == []
+    assert planner.stats["unchanged"] == 10
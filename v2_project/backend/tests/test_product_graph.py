@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+from app.core.product_graph import ProductGraph, parse_accessories, parse_successor
+
+
+def product(part_number, successor=None, accessories=None, phased_out=False):
+    return {
+        "part_number": part_number,
+        "name": f"Product {part_number}",
+        "phased_out": phased_out,
+        "successor_product": f"Product {successor} (Part: {successor})" if successor else "N/A",
+        "suitable_accessories": accessories or "N/A",
+    }
+
+
+def build(*docs):
+    graph = ProductGraph()
+    for doc in docs:
+        graph.add_product(doc)
+    return graph
+
+
+def test_parse_successor():
+    assert parse_successor("WTB4S-3P2161 (Part: 1042176) | URL: https://example.com/p/1042176") == {
+        "part_number": "1042176", "name": "WTB4S-3P2161", "url": "https://example.com/p/1042176"}
+    assert parse_successor("N/A") is None
+    assert parse_successor("Something (Part: N/A)") is None
+
+
+def test_parse_accessories():
+    assert parse_accessories("Bracket (2019506)|Cable (2095608)") == [
+        {"part_number": "2019506", "name": "Bracket"}, {"part_number": "2095608", "name": "Cable"}]
+    assert parse_accessories("N/A") == []
+
+
+def test_successor_chain_follows_successors():
+    graph = build(product("A", "B", phased_out=True), product("B", "C", phased_out=True), product("C"))
+    assert graph.successor_chain("A") == ["B", "C"]
+    assert graph.replacement("A") == "C"
+    assert graph.replacement("C") is None
+
+
+def test_successor_chain_stops_on_cycles():
+    graph = build(product("A", "B"), product("B", "C"), product("C", "A"))
+    assert graph.successor_chain("A") == ["B", "C"]
+    assert graph.successor_chain("B") == ["C", "A"]
+
+
+def test_self_successor_is_ignored():
+    graph = build(product("A", "A"))
+    assert graph.successor_chain("A") == []
+
+
+def test_successor_chain_respects_max_depth():
+    graph = build(*(product(str(n), str(n + 1)) for n in range(20)))
+    assert graph.successor_chain("0", max_depth=3) == ["1", "2", "3"]
+
+
+def test_accessories_fall_back_to_replacement():
+    graph = build(product("A", "B", phased_out=True), product("B", accessories="Bracket (X1)"))
+    assert graph.accessories_for("A") == ["X1"]
+    assert graph.names["X1"] == "Bracket"
+
+
+def test_dict_round_trip():
+    graph = build(product("A", "B", accessories="Bracket (X1)", phased_out=True))
+    restored = ProductGraph.from_dict(graph.to_dict())
+    assert restored.successor_chain("A") == ["B"]
+    assert restored.accessories_for("A") == ["X1"]
+    assert "A" in restored.phased_out
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("elasticsearch")
+pytest.importorskip("qdrant_client")
+
+from app.core.search_service import InvalidCursorError, SearchService
+
+PRODUCTS = {
+    "1000001": {"part_number": "1000001", "name": "Sensor A", "phased_out": False},
+    "1000002": {"part_number": "1000002", "name": "Sensor B", "phased_out": True},
+}
+
+
+class FakeMSearch:
+    """Evaluates the ids + phased_out filter of the hybrid filter check"""
+
+    def __init__(self):
+        self.bodies = []
+
+    async def search(self, index, body):
+        self.bodies.append(body)
+        clauses = body["query"]["bool"]["filter"]
+        ids = next(c["ids"]["values"] for c in clauses if "ids" in c)
+        terms = [c["term"] for c in clauses if "term" in c]
+        hits = [
+            {"_source": {"part_number": pn}}
+            for pn in ids
+            if all(PRODUCTS[pn].get(field) == value for term in terms for field, value in term.items())
+        ]
+        return {"hits": {"hits": hits}}
+
+
+def make_service(text_results, semantic_results):
+    service = SearchService.__new__(SearchService)
+    service.msearch = FakeMSearch()
+
+    async def text_search(query, size=10, filters=None):
+        return [dict(p, _score=5.0) for p in text_results]
+
+    async def semantic_search(query, limit=10, filters=None):
+        return [dict(p, _score=0.9) for p in semantic_results]
+
+    service.text_search = text_search
+    service.semantic_search = semantic_search
+    return service
+
+
+def test_hybrid_search_drops_phased_out_semantic_hits():
+    service = make_service([PRODUCTS["1000001"]], [PRODUCTS["1000002"], PRODUCTS["1000001"]])
+    results = asyncio.run(service.hybrid_search("sensor", filters={"phased_out": False}))
+
+    assert [p["part_number"] for p in results] == ["1000001"]
+    assert {"term": {"phased_out": False}} in service.msearch.bodies[0]["query"]["bool"]["filter"]
+
+
+def test_hybrid_search_keeps_semantic_hits_without_es_only_filters():
+    service = make_service([], [PRODUCTS["1000002"]])
+    results = asyncio.run(service.hybrid_search("sensor", filters={"category": "Sensors"}))
+
+    assert [p["part_number"] for p in results] == ["1000002"]
+    assert service.msearch.bodies == []
+
+
+class FakePagingES:
+    def __init__(self, hits, fail=False):
+        self.hits = hits
+        self.fail = fail
+        self.closed = []
+
+    async def open_point_in_time(self, index, keep_alive):
+        return {"id": "pit-1"}
+
+    async def close_point_in_time(self, id):
+        self.closed.append(id)
+
+    async def search(self, body):
+        if self.fail:
+            raise RuntimeError("search failed")
+        start = body.get("search_after", [0])[0]
+        page = self.hits[start:start + body["size"]]
+        return {"pit_id": "pit-1", "hits": {"hits": [
+            {"_source": dict(h), "_score": 1.0, "sort": [start + i + 1]} for i, h in enumerate(page)
+        ]}}
+
+
+def make_paging_service(es):
+    service = SearchService.__new__(SearchService)
+    service.es = es
+    return service
+
+
+def test_text_search_page_cursor_is_bound_to_query_and_filters():
+    es = FakePagingES([{"part_number": str(n)} for n in range(5)])
+    service = make_paging_service(es)
+    first = asyncio.run(service.text_search_page("sensor", size=2, filters={"brand": "SICK"}))
+    assert first["has_more"]
+
+    second = asyncio.run(service.text_search_page("sensor", size=2, filters={"brand": "SICK"},
+                                                  cursor=first["cursor"]))
+    assert [p["part_number"] for p in second["results"]] == ["2", "3"]
+
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(service.text_search_page("sensor", size=2, filters={"brand": "Other"}, cursor=first["cursor"]))
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(service.text_search_page("encoder", size=2, cursor=first["cursor"]))
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(service.text_search_page("sensor", size=2, cursor="not-a-cursor"))
+
+
+def test_text_search_page_closes_pit_on_error():
+    es = FakePagingES([], fail=True)
+    page = asyncio.run(make_paging_service(es).text_search_page("sensor"))
+    assert page == {"results": [], "cursor": None, "has_more": False}
+    assert es.closed == ["pit-1"]
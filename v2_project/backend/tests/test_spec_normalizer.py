@@ -0,0 +1,64 @@
+import pytest
+
+from app.core.spec_normalizer import (
+    normalize_specifications,
+    parse_spec_value,
+    requirements_to_spec_filters,
+    slugify_spec_key,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("10 V DC ... 30 V DC 1)", {"min": 10.0, "max": 30.0, "unit": "V"}),
+    ("12 V DC 1) ... 24 V DC", {"min": 12.0, "max": 24.0, "unit": "V"}),
+    ("10 ... 32 V", {"min": 10.0, "max": 32.0, "unit": "V"}),
+    ("10 V to 30 V", {"min": 10.0, "max": 30.0, "unit": "V"}),
+    ("24 V DC", {"min": 24.0, "max": 24.0, "unit": "V"}),
+    ("0 mm ... 3.5 m", {"min": 0.0, "max": 3500.0, "unit": "mm"}),
+    ("-25 °C ... +55 °C", {"min": -25.0, "max": 55.0, "unit": "°C"}),
+    ("4 mm (Sn)", {"min": 4.0, "max": 4.0, "unit": "mm"}),
+    ("1,024", {"min": 1024.0, "max": 1024.0, "unit": None}),
+    ("0.110 Kilograms", {"min": 0.11, "max": 0.11, "unit": "kg"}),
+])
+def test_parse_spec_value(value, expected):
+    assert parse_spec_value(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("≤ 600 kHz", {"min": None, "max": 600000.0, "unit": "Hz"}),
+    ("≥ 1 ms", {"min": 1.0, "max": None, "unit": "ms"}),
+    ("± 0.5 mm", {"min": -0.5, "max": 0.5, "unit": "mm"}),
+])
+def test_parse_spec_value_operators(value, expected):
+    assert parse_spec_value(value) == expected
+
+
+@pytest.mark.parametrize("value", ["Yes", "PNP", "", None])
+def test_parse_spec_value_not_numeric(value):
+    assert parse_spec_value(value) is None
+
+
+@pytest.mark.parametrize("key, slug", [
+    ("Electronics > Supply voltage UB", "supply_voltage"),
+    ("Electronics > Output current IA", "output_current"),
+    ("Safety-related parameters > Supply voltage", "supply_voltage"),
+    ("Features > Sensing range", "sensing_range"),
+    ("Features > EAN", "ean"),
+    ("supply voltage", "supply_voltage"),
+])
+def test_slugify_spec_key(key, slug):
+    assert slugify_spec_key(key) == slug
+
+
+def test_normalize_specifications():
+    spec_num = normalize_specifications({
+        "Electronics > Supply voltage UB": "10 V DC ... 30 V DC 1)",
+        "Features > ECLASS 5.0": "27279202",
+        "Features > Product": "Reflectors",
+    })
+    assert spec_num == {"supply_voltage": {"min": 10.0, "max": 30.0, "unit": "V"}}
+
+
+def test_requirements_to_spec_filters():
+    filters = requirements_to_spec_filters({"supply voltage": "24 V", "housing": "metal"})
+    assert filters == {"supply_voltage": {"unit": "V", "covers": [24.0, 24.0]}}